@@ -1,5 +1,7 @@
 --Reformat the final_assignments_qa to look like the final_assignments table, filling in any missing values with a placeholder of the appropriate data type.
 
+-- experiments.reconcile.unpivot_sql(tests) writes this statement for any list of test columns, and
+-- experiments.reconcile.reconcile(qa, final_assignments) diffs the result against dsv1069.final_assignments.
 SELECT item_id,
        UNNEST(ARRAY[test_a, test_b, test_c, test_d, test_e, test_f]) AS test_assignment,
        UNNEST(ARRAY['test_a', 'test_b', 'test_c', 'test_d', 'test_e', 'test_f']) AS test_number,
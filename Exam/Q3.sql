@@ -8,7 +8,7 @@ WITH item_level AS (
     fa.test_assignment,
     fa.item_id, 
     -- Use COALESCE to handle potential NULL values from the LEFT JOIN
-    COALESCE(MAX(CASE WHEN orders.created_at > fa.test_start_date THEN 1 ELSE 0 END), 0) AS order_binary_30d
+    COALESCE(MAX(CASE WHEN orders.created_at >= fa.test_start_date THEN 1 ELSE 0 END), 0) AS order_binary_30d
   FROM 
     dsv1069.final_assignments fa
   LEFT OUTER JOIN
@@ -16,7 +16,9 @@ WITH item_level AS (
   ON 
     fa.item_id = orders.item_id 
     AND orders.created_at >= fa.test_start_date
-    AND DATE_PART('day', orders.created_at - fa.test_start_date ) <= 30
+    -- bounded window [test_start_date, test_start_date + 31 days), compared directly to the event time:
+    -- day 30 after the start is included, as it was with DATE_PART('day', ...) <= 30
+    AND orders.created_at < fa.test_start_date + INTERVAL '31 days'
   WHERE 
     fa.test_number = 'item_test_2'
   GROUP BY
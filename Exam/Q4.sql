@@ -21,7 +21,7 @@ item_level AS (
     fa.test_assignment,
     fa.item_id, 
     -- Use COALESCE to handle potential NULL values from the LEFT JOIN
-    COALESCE(MAX(CASE WHEN views.event_time > fa.test_start_date THEN 1 ELSE 0 END), 0) AS view_binary_30d,
+    COALESCE(MAX(CASE WHEN views.event_time >= fa.test_start_date THEN 1 ELSE 0 END), 0) AS view_binary_30d,
     COUNT(views.event_id) AS views
   FROM 
     dsv1069.final_assignments fa
@@ -32,7 +32,9 @@ item_level AS (
   AND 
     views.event_time >= fa.test_start_date
   AND 
-    DATE_PART('day', views.event_time - fa.test_start_date ) <= 30
+    -- bounded window [test_start_date, test_start_date + 31 days), compared directly to the event time:
+    -- day 30 after the start is included, as it was with DATE_PART('day', ...) <= 30
+    views.event_time < fa.test_start_date + INTERVAL '31 days'
   WHERE 
     fa.test_number = 'item_test_2'
   GROUP BY
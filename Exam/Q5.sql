@@ -2,6 +2,9 @@
 
 --Use the https://thumbtack.github.io/abba/demo/abba.html to compute the lifts in metrics and the p-values for the binary metrics ( 30 day order binary and 30 day view binary) using a interval 95% confidence. 
 
+-- Without the calculator: experiments.readout.readout(arms, ['view_binary_30d', 'order_binary_30d']) computes the lifts,
+-- 95% intervals and p-values locally, from the per-arm rows of experiments.metrics.run_metrics(connection, 'item_test_2').
+
 -- anwser:
 --For views_item:  lift is and pval is 9.4% – 16% (13%) and pval is 0.0001
 --Therefore for item_test_2, 'not statistically significant' there was no significant difference in either the number of views or the number of orders between control and experiment
@@ -25,7 +28,7 @@ item_level AS (
     fa.test_assignment,
     fa.item_id, 
     -- Use COALESCE to handle potential NULL values from the LEFT JOIN
-    COALESCE(MAX(CASE WHEN views.event_time > fa.test_start_date THEN 1 ELSE 0 END), 0) AS view_binary_30d
+    COALESCE(MAX(CASE WHEN views.event_time >= fa.test_start_date THEN 1 ELSE 0 END), 0) AS view_binary_30d
   FROM 
     dsv1069.final_assignments fa
   LEFT OUTER JOIN 
@@ -35,7 +38,9 @@ item_level AS (
   AND 
     views.event_time >= fa.test_start_date
   AND 
-    DATE_PART('day', views.event_time - fa.test_start_date ) <= 30
+    -- bounded window [test_start_date, test_start_date + 31 days), compared directly to the event time:
+    -- day 30 after the start is included, as it was with DATE_PART('day', ...) <= 30
+    views.event_time < fa.test_start_date + INTERVAL '31 days'
   WHERE 
     fa.test_number = 'item_test_2'
   GROUP BY
@@ -0,0 +1 @@
+"""Helpers for the item-level A/B test queries of the Exam (Q1.sql to Q5.sql)."""
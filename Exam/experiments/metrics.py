@@ -0,0 +1,147 @@
+"""Item-level test metrics computed in one fused query.
+
+Q3.sql, Q4.sql and Q5.sql each rebuild the same shape by hand: a CTE that
+filters ``dsv1069.events`` (or reads ``dsv1069.orders``), a LEFT JOIN to
+``final_assignments`` and a ``MAX(CASE WHEN ...)`` binary per item, so every
+metric scans the events table again. :func:`metric_sql` generates one query
+for any set of :data:`METRICS` and tests: the events table is read once for
+all the event types the metrics need (``event_name IN (...)``), the
+activity is joined to the assignments on a bounded window, and every metric
+is a conditional aggregate of that single join. The window of
+``window_days`` runs through day ``window_days`` after the start
+(``[test_start_date, test_start_date + window_days + 1 days)``), the days
+``DATE_PART('day', event_time - test_start_date) <= 30`` kept in Q3 to Q5.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import pandas as pd
+
+SCHEMA = 'dsv1069'
+
+WINDOW_DAYS = 30
+
+# activity read from dsv1069.orders rather than from the events table
+ORDER = 'order'
+
+
+def _quoted(values: Sequence[str]) -> str:
+    """SQL string literals of ``values``, with their quotes escaped."""
+    return ', '.join("'" + value.replace("'", "''") + "'" for value in values)
+
+
+@dataclass(frozen=True)
+class Metric:
+    """An item-level metric: ``binary`` (did it happen) or ``count`` of an activity.
+
+    ``activity`` is an ``event_name`` of the events table, or :data:`ORDER`.
+    ``name`` becomes a column name, so it must be an identifier.
+    """
+
+    name: str
+    kind: str
+    activity: str
+
+    def __post_init__(self):
+        if self.kind not in ('binary', 'count'):
+            raise ValueError(f"kind must be 'binary' or 'count', got {self.kind!r}")
+        if not self.name.isidentifier():
+            raise ValueError(f'metric name must be an identifier, got {self.name!r}')
+
+    def column(self, window_days: int) -> str:
+        return f'{self.name}_{window_days}d'
+
+    def item_sql(self, window_days: int) -> str:
+        """The per-item aggregate over the windowed join."""
+        matched = f'a.activity = {_quoted([self.activity])}'
+        if self.kind == 'binary':
+            return f'MAX(CASE WHEN {matched} THEN 1 ELSE 0 END) AS {self.column(window_days)}'
+        return f'COUNT(CASE WHEN {matched} THEN 1 END) AS {self.column(window_days)}'
+
+
+METRICS = {
+    'view_binary': Metric('view_binary', 'binary', 'view_item'),
+    'views': Metric('views', 'count', 'view_item'),
+    'order_binary': Metric('order_binary', 'binary', ORDER),
+    'orders': Metric('orders', 'count', ORDER),
+}
+
+
+def activity_sql(activities: Sequence[str], schema: str = SCHEMA) -> str:
+    """One row per (item_id, event_time, activity), with one scan per source table."""
+    events = sorted(set(activities) - {ORDER})
+    branches = []
+    if events:
+        branches.append(
+            f'SELECT CAST(parameter_value AS INT) AS item_id, event_time, event_name AS activity\n'
+            f'  FROM {schema}.events\n'
+            f"  WHERE event_name IN ({_quoted(events)}) AND parameter_name = 'item_id'"
+        )
+    if ORDER in activities:
+        branches.append(f"SELECT item_id, created_at AS event_time, '{ORDER}' AS activity\n  FROM {schema}.orders")
+    return '\n  UNION ALL\n  '.join(branches)
+
+
+def metric_sql(
+    tests: str | Sequence[str],
+    metrics: Sequence[str | Metric] = ('view_binary', 'order_binary'),
+    window_days: int = WINDOW_DAYS,
+    schema: str = SCHEMA,
+    level: str = 'arm',
+) -> str:
+    """The fused query for ``metrics`` of ``tests``.
+
+    ``level='arm'`` returns one row per test and assignment with the number
+    of items and the sum of every metric (the final SELECT of Q3/Q4);
+    ``level='item'`` returns the item-level rows.
+    """
+    tests = [tests] if isinstance(tests, str) else list(tests)
+    metrics = [METRICS[metric] if isinstance(metric, str) else metric for metric in metrics]
+    if level not in ('arm', 'item'):
+        raise ValueError(f"level must be 'arm' or 'item', got {level!r}")
+    item_columns = ',\n    '.join(metric.item_sql(window_days) for metric in metrics)
+    item_level = f"""WITH activity AS (
+  {activity_sql([metric.activity for metric in metrics], schema)}
+),
+
+item_level AS (
+  SELECT
+    fa.test_number,
+    fa.test_assignment,
+    fa.item_id,
+    {item_columns}
+  FROM {schema}.final_assignments fa
+  LEFT OUTER JOIN activity a
+  ON fa.item_id = a.item_id
+  AND a.event_time >= fa.test_start_date
+  AND a.event_time < fa.test_start_date + INTERVAL '{window_days + 1} days'
+  WHERE fa.test_number IN ({_quoted(tests)})
+  GROUP BY fa.test_number, fa.test_assignment, fa.item_id
+)
+"""
+    if level == 'item':
+        return item_level + '\nSELECT * FROM item_level'
+    sums = ',\n  '.join(f'SUM({metric.column(window_days)}) AS {metric.column(window_days)}' for metric in metrics)
+    return item_level + f"""
+SELECT
+  test_number,
+  test_assignment,
+  COUNT(item_id) AS items,
+  {sums}
+FROM item_level
+GROUP BY test_number, test_assignment
+ORDER BY test_number, test_assignment"""
+
+
+def run_metrics(
+    connection,
+    tests: str | Sequence[str],
+    metrics: Sequence[str | Metric] = ('view_binary', 'order_binary'),
+    window_days: int = WINDOW_DAYS,
+    schema: str = SCHEMA,
+    level: str = 'arm',
+) -> pd.DataFrame:
+    """Run :func:`metric_sql` on ``connection`` (a DB-API connection or SQLAlchemy engine)."""
+    return pd.read_sql(metric_sql(tests, metrics, window_days, schema, level), connection)
@@ -0,0 +1,78 @@
+"""Lift, confidence interval and p-value of binary test metrics.
+
+Q5.sql asked to copy the per-arm counts into the ABBA web calculator. The
+per-arm rows of :func:`experiments.metrics.run_metrics` (items and the sum
+of every binary metric per test and assignment) go straight into
+:func:`readout`, which computes every test and metric in one set of array
+operations: the rates of both arms, the relative lift with its confidence
+interval and the two-sided p-value of the two-proportion z-test.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+
+def two_proportions(
+    control_successes,
+    control_trials,
+    treatment_successes,
+    treatment_trials,
+    confidence: float = 0.95,
+) -> dict[str, np.ndarray]:
+    """Compare two proportions element-wise; inputs broadcast like NumPy arrays.
+
+    The interval of the lift is the unpooled (Wald) interval of the
+    difference of the rates, relative to the control rate; the p-value uses
+    the pooled standard error.
+    """
+    x_c, n_c, x_t, n_t = (np.asarray(values, dtype=np.float64) for values in
+                          (control_successes, control_trials, treatment_successes, treatment_trials))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        p_c, p_t = x_c / n_c, x_t / n_t
+        difference = p_t - p_c
+        margin = ndtri(0.5 + confidence / 2) * np.sqrt(p_c * (1 - p_c) / n_c + p_t * (1 - p_t) / n_t)
+        pooled = (x_c + x_t) / (n_c + n_t)
+        z = difference / np.sqrt(pooled * (1 - pooled) * (1 / n_c + 1 / n_t))
+        return {
+            'control_rate': p_c,
+            'treatment_rate': p_t,
+            'lift': difference / p_c,
+            'lift_low': (difference - margin) / p_c,
+            'lift_high': (difference + margin) / p_c,
+            'z': z,
+            'p_value': 2 * ndtr(-np.abs(z)),
+        }
+
+
+def readout(
+    arms: pd.DataFrame,
+    metrics: Sequence[str],
+    control=0,
+    treatment=1,
+    confidence: float = 0.95,
+    test: str = 'test_number',
+    arm: str = 'test_assignment',
+    trials: str = 'items',
+) -> pd.DataFrame:
+    """One row per test and binary metric of ``arms`` (one row per test and arm).
+
+    ``significant`` is true when the p-value is below ``1 - confidence``.
+    """
+    wide = arms.pivot_table(index=test, columns=arm, values=[trials, *metrics], aggfunc='sum')
+    metrics = list(metrics)
+    # (tests, metrics) arrays, each test's trials broadcast over its metrics
+    result = two_proportions(
+        wide.xs(control, axis=1, level=arm)[metrics].to_numpy(),
+        wide[(trials, control)].to_numpy()[:, None],
+        wide.xs(treatment, axis=1, level=arm)[metrics].to_numpy(),
+        wide[(trials, treatment)].to_numpy()[:, None],
+        confidence,
+    )
+    index = pd.MultiIndex.from_product([wide.index, metrics], names=[test, 'metric'])
+    frame = pd.DataFrame({name: values.ravel() for name, values in result.items()}, index=index)
+    frame['significant'] = frame['p_value'] < 1 - confidence
+    return frame
@@ -0,0 +1,142 @@
+"""Reshape ``final_assignments_qa`` and reconcile it with ``final_assignments``.
+
+Q2.sql lists the test columns of the wide QA table by hand in two
+``UNNEST(ARRAY[...])`` calls. :func:`unpivot_sql` generates that statement
+for any list of tests, and :func:`melt_assignments` does the same reshape in
+pandas with one NumPy pass over the test columns, filling missing values
+with placeholders of the right type (:data:`PLACEHOLDERS`).
+:func:`reconcile` streams QA chunks against ``final_assignments``, matching
+rows on (item_id, test_number) through an index of the final keys built
+once, and reports the assignments missing from ``final_assignments``, the
+extra ones, the mismatched ones and the keys ``final_assignments`` holds
+more than once.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Q2.sql's start date for tests that have none in the QA table, and -1 for a missing assignment
+PLACEHOLDERS = {
+    'test_assignment': -1,
+    'test_start_date': pd.Timestamp('2024-01-02 00:00:00'),
+}
+
+COLUMNS = ('item_id', 'test_assignment', 'test_number', 'test_start_date')
+
+
+def test_columns(qa: pd.DataFrame, item: str = 'item_id') -> list[str]:
+    return [column for column in qa.columns if column != item]
+
+
+def unpivot_sql(tests: Sequence[str], table: str = 'dsv1069.final_assignments_qa', item: str = 'item_id') -> str:
+    """Q2.sql for ``tests``: one scan of ``table``, one output row per item and test."""
+    columns = ', '.join(tests)
+    names = ', '.join(f"'{test}'" for test in tests)
+    start = PLACEHOLDERS['test_start_date']
+    return f"""SELECT {item},
+       COALESCE(test_assignment, {PLACEHOLDERS['test_assignment']}) AS test_assignment,
+       test_number,
+       CAST('{start}' AS timestamp) AS test_start_date
+FROM (
+  SELECT {item},
+         UNNEST(ARRAY[{columns}]) AS test_assignment,
+         UNNEST(ARRAY[{names}]) AS test_number
+  FROM {table}
+) AS long_assignments"""
+
+
+def melt_assignments(qa: pd.DataFrame, tests: Sequence[str] | None = None, item: str = 'item_id') -> pd.DataFrame:
+    """The long ``final_assignments`` form of the wide ``qa`` frame."""
+    tests = test_columns(qa, item) if tests is None else list(tests)
+    values = qa[tests].to_numpy(dtype='float64', na_value=np.nan).ravel()
+    assignments = np.where(np.isnan(values), PLACEHOLDERS['test_assignment'], values).astype(np.int64)
+    return pd.DataFrame({
+        'item_id': np.repeat(qa[item].to_numpy(), len(tests)),
+        'test_assignment': assignments,
+        'test_number': pd.Categorical.from_codes(np.tile(np.arange(len(tests)), len(qa)), tests),
+        'test_start_date': PLACEHOLDERS['test_start_date'],
+    }, columns=list(COLUMNS))
+
+
+def assignment_keys(frame: pd.DataFrame) -> pd.MultiIndex:
+    """(item_id, test_number) of every row, test numbers as text."""
+    return pd.MultiIndex.from_arrays(
+        [frame['item_id'].to_numpy(), frame['test_number'].astype(str).to_numpy()], names=['item_id', 'test_number'],
+    )
+
+
+def _dates(values: pd.Series) -> np.ndarray:
+    return pd.to_datetime(values).to_numpy(dtype='datetime64[ns]')
+
+
+@dataclass
+class ReconcileReport:
+    missing: pd.DataFrame
+    extra: pd.DataFrame
+    mismatched: pd.DataFrame
+    duplicates: pd.DataFrame
+
+    @property
+    def ok(self) -> bool:
+        return self.missing.empty and self.extra.empty and self.mismatched.empty and self.duplicates.empty
+
+    def counts(self) -> pd.Series:
+        return pd.Series({'missing': len(self.missing), 'extra': len(self.extra),
+                          'mismatched': len(self.mismatched), 'duplicates': len(self.duplicates)})
+
+
+def reconcile(
+    qa_chunks: pd.DataFrame | Iterable[pd.DataFrame],
+    final: pd.DataFrame,
+    tests: Sequence[str] | None = None,
+) -> ReconcileReport:
+    """Diff the melted QA table against ``final`` (the ``final_assignments`` rows).
+
+    ``qa_chunks`` is the wide QA frame or an iterable of its chunks. Only
+    one melted chunk is held at a time. ``missing`` holds the QA rows absent
+    from ``final``. ``mismatched`` holds the QA rows whose assignment or
+    start date differs, with the ``final_assignment`` and
+    ``final_test_start_date``. ``extra`` holds the rows of ``final`` whose
+    key no QA row has, and ``duplicates`` every row of ``final`` whose key
+    it holds more than once; both are restricted to the QA tests. A QA row
+    is compared with the first ``final`` row of its key.
+    """
+    if isinstance(qa_chunks, pd.DataFrame):
+        qa_chunks = [qa_chunks]
+    final_keys = assignment_keys(final)
+    repeated = final_keys.duplicated(keep=False)
+    first = np.flatnonzero(~final_keys.duplicated())
+    # unique keys, position i of the lookup is row first[i] of final
+    lookup = final_keys[first]
+    final_assignments = final['test_assignment'].to_numpy()[first]
+    final_dates = _dates(final['test_start_date'])[first]
+    seen = np.zeros(len(lookup), dtype=bool)
+    missing, mismatched, qa_tests = [], [], set()
+    for chunk in qa_chunks:
+        long = melt_assignments(chunk, tests)
+        qa_tests.update(long['test_number'].cat.categories)
+        found = lookup.get_indexer(assignment_keys(long))
+        matched = found >= 0
+        rows = found[matched]
+        seen[rows] = True
+        missing.append(long.loc[~matched])
+        dates = _dates(long['test_start_date'])[matched]
+        same_date = (dates == final_dates[rows]) | (np.isnat(dates) & np.isnat(final_dates[rows]))
+        differs = (long['test_assignment'].to_numpy()[matched] != final_assignments[rows]) | ~same_date
+        mismatched.append(long.loc[matched].loc[differs].assign(
+            final_assignment=final_assignments[rows][differs],
+            final_test_start_date=final_dates[rows][differs],
+        ))
+    in_qa_tests = final['test_number'].astype(str).isin(qa_tests).to_numpy()
+    unseen = ~seen[lookup.get_indexer(final_keys)]
+    return ReconcileReport(
+        pd.concat(missing, ignore_index=True) if missing else pd.DataFrame(columns=list(COLUMNS)),
+        final.loc[unseen & in_qa_tests].reset_index(drop=True),
+        pd.concat(mismatched, ignore_index=True) if mismatched
+        else pd.DataFrame(columns=[*COLUMNS, 'final_assignment', 'final_test_start_date']),
+        final.loc[repeated & in_qa_tests].reset_index(drop=True),
+    )
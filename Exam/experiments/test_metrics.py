@@ -0,0 +1,46 @@
+import pytest
+
+from experiments.metrics import Metric, metric_sql
+
+duckdb = pytest.importorskip('duckdb')
+
+
+@pytest.fixture
+def connection():
+    connection = duckdb.connect()
+    connection.execute('CREATE SCHEMA dsv1069')
+    connection.execute('CREATE TABLE dsv1069.events (event_time TIMESTAMP, event_name VARCHAR, '
+                       'parameter_name VARCHAR, parameter_value VARCHAR)')
+    connection.execute('CREATE TABLE dsv1069.orders (item_id INTEGER, created_at TIMESTAMP)')
+    connection.execute('CREATE TABLE dsv1069.final_assignments (test_number VARCHAR, test_assignment INTEGER, '
+                       'item_id INTEGER, test_start_date TIMESTAMP)')
+    connection.execute("INSERT INTO dsv1069.final_assignments VALUES "
+                       "('o''brien test', 0, 1, '2024-01-01'), ('o''brien test', 1, 2, '2024-01-01')")
+    connection.execute("INSERT INTO dsv1069.events VALUES "
+                       "('2024-01-02', 'shopper''s view', 'item_id', '1'), "
+                       "('2024-01-03', 'shopper''s view', 'item_id', '1'), "
+                       "('2024-01-02', 'view_item', 'item_id', '2')")
+    return connection
+
+
+def test_quotes_in_activities_and_test_names(connection):
+    metrics = [Metric('quoted_views', 'count', "shopper's view"), 'view_binary']
+    rows = connection.execute(metric_sql("o'brien test", metrics, level='item')).df()
+    rows = rows.sort_values('item_id')
+    assert rows['quoted_views_30d'].tolist() == [2, 0]
+    assert rows['view_binary_30d'].tolist() == [0, 1]
+
+
+def test_metric_names_must_be_identifiers():
+    with pytest.raises(ValueError):
+        Metric('views; DROP TABLE x', 'count', 'view_item')
+
+
+def test_window_includes_the_start_and_day_30(connection):
+    connection.execute("INSERT INTO dsv1069.events VALUES "
+                       "('2024-01-01', 'view_item', 'item_id', '1'), "
+                       "('2024-01-31 12:00', 'view_item', 'item_id', '1'), "
+                       "('2024-02-01', 'view_item', 'item_id', '1'), "
+                       "('2023-12-31 23:59', 'view_item', 'item_id', '1')")
+    rows = connection.execute(metric_sql("o'brien test", ['views'], level='item')).df()
+    assert rows.set_index('item_id').loc[1, 'views_30d'] == 2
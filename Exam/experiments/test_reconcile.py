@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from experiments.reconcile import PLACEHOLDERS, melt_assignments, reconcile
+
+START = PLACEHOLDERS['test_start_date']
+
+
+def qa_frame():
+    return pd.DataFrame({
+        'item_id': [1, 2, 3],
+        'test_a': [0, 1, np.nan],
+        'test_b': [1, 0, 1],
+    })
+
+
+def test_final_built_from_the_qa_table_reconciles():
+    report = reconcile(qa_frame(), melt_assignments(qa_frame()))
+    assert report.ok
+    assert report.counts().tolist() == [0, 0, 0, 0]
+
+
+def test_every_kind_of_difference():
+    final = melt_assignments(qa_frame())
+    final['test_number'] = final['test_number'].astype(str)
+    # item 1 test_a: other assignment; item 2 test_b: other start date; item 3 test_b: gone
+    final.loc[0, 'test_assignment'] = 1
+    final.loc[3, 'test_start_date'] = START + pd.Timedelta(days=1)
+    final = final.drop(index=5)
+    # a test_a row for an item the QA table does not have, a second copy of item 2 test_a
+    # and a row of a test the QA table does not list
+    final = pd.concat([final, pd.DataFrame({
+        'item_id': [9, 2, 9],
+        'test_assignment': [0, 1, 0],
+        'test_number': ['test_a', 'test_a', 'test_c'],
+        'test_start_date': [START, START, START],
+    })], ignore_index=True)
+
+    chunks = [qa_frame().iloc[:2], qa_frame().iloc[2:]]
+    report = reconcile(chunks, final)
+
+    assert list(zip(report.missing['item_id'], report.missing['test_number'].astype(str))) == [(3, 'test_b')]
+    mismatched = report.mismatched.set_index(['item_id', report.mismatched['test_number'].astype(str)])
+    assert sorted(mismatched.index) == [(1, 'test_a'), (2, 'test_b')]
+    assert mismatched.loc[(1, 'test_a'), 'final_assignment'] == 1
+    assert mismatched.loc[(2, 'test_b'), 'final_test_start_date'] == START + pd.Timedelta(days=1)
+    # the copy of a key the QA table has is a duplicate, not an extra row
+    assert report.extra[['item_id', 'test_number']].values.tolist() == [[9, 'test_a']]
+    assert report.duplicates[['item_id', 'test_number']].values.tolist() == [[2, 'test_a'], [2, 'test_a']]
+    assert not report.ok
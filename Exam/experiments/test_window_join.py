@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from experiments.window_join import WINDOW, window_join
+
+
+def naive_join(events, assignments, window=WINDOW):
+    """Every (assignment, event) pair of the same item with start <= event_time < start + window."""
+    pairs = assignments.reset_index(drop=True).rename_axis('assignment').reset_index().merge(
+        events.reset_index(drop=True).rename_axis('event').reset_index(), on='item_id')
+    inside = (pairs['event_time'] >= pairs['test_start_date']) & (pairs['event_time'] < pairs['test_start_date'] + window)
+    return pairs.loc[inside, ['assignment', 'event']]
+
+
+def random_data(seed, events=500, assignments=60, items=15):
+    rng = np.random.default_rng(seed)
+    base = pd.Timestamp('2024-01-01')
+    # whole days, so that events often fall exactly on window boundaries
+    return (
+        pd.DataFrame({
+            'item_id': rng.integers(0, items, events),
+            'event_time': base + pd.to_timedelta(rng.integers(0, 120, events), unit='D'),
+        }),
+        pd.DataFrame({
+            'item_id': rng.integers(0, items + 3, assignments),
+            'test_start_date': base + pd.to_timedelta(rng.integers(-20, 100, assignments), unit='D'),
+        }),
+    )
+
+
+def assert_matches_naive(events, assignments, window=WINDOW):
+    matches = window_join(events, assignments, window)
+    expected = naive_join(events, assignments, window)
+    counts = expected.groupby('assignment').size().reindex(range(len(assignments)), fill_value=0).to_numpy()
+    np.testing.assert_array_equal(matches.counts, counts)
+    np.testing.assert_array_equal(matches.binary, (counts > 0).astype(np.int8))
+    assignment, event = matches.pairs()
+    got = sorted(zip(assignment.tolist(), event.tolist()))
+    assert got == sorted(zip(expected['assignment'].tolist(), expected['event'].tolist()))
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_naive_join(seed):
+    assert_matches_naive(*random_data(seed))
+
+
+@pytest.mark.parametrize('window', [pd.Timedelta(days=1), pd.Timedelta(hours=36), pd.Timedelta(days=45)])
+def test_matches_naive_join_for_other_windows(window):
+    assert_matches_naive(*random_data(0), window)
+
+
+def test_window_includes_its_start_and_excludes_its_end():
+    start = pd.Timestamp('2024-03-01')
+    events = pd.DataFrame({
+        'item_id': [1, 1, 1, 1, 2],
+        'event_time': [start - pd.Timedelta(seconds=1), start, start + WINDOW - pd.Timedelta(seconds=1),
+                       start + WINDOW, start],
+    })
+    assignments = pd.DataFrame({'item_id': [1], 'test_start_date': [start]})
+    matches = window_join(events, assignments)
+    assert matches.counts.tolist() == [2]
+    assert sorted(matches.pairs()[1].tolist()) == [1, 2]
+
+
+def test_no_events_or_no_assignments():
+    events, assignments = random_data(1)
+    assert window_join(events.iloc[:0], assignments).counts.tolist() == [0] * len(assignments)
+    assert len(window_join(events, assignments.iloc[:0]).counts) == 0
+    assert_matches_naive(events, assignments.iloc[:0])
@@ -0,0 +1,88 @@
+"""Sort-merge join of activity to assignment windows.
+
+The "30 day" metrics join every event of an item to every assignment of
+that item, and Q3/Q4 bounded the join with ``DATE_PART('day', ...) <= 30``,
+which cannot use the event time ordering and reads the days field of an
+interval rather than its length. :func:`window_join` sorts the events by
+(item, time) once and merges the window boundaries of all assignments into
+that order: the number of events sorted before a boundary is its position
+in the sorted events, so each window is a slice ``[lo, hi)`` and the work
+and output are bounded by the events that actually fall in a window.
+
+It is the in-memory counterpart of the SQL join of
+:mod:`experiments.metrics`, for events already loaded into pandas; the
+metric queries do not use it. Its default window covers the same days,
+through day :data:`~experiments.metrics.WINDOW_DAYS` after the start.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from experiments.metrics import WINDOW_DAYS
+
+# [start, start + WINDOW_DAYS + 1 days): day WINDOW_DAYS after the start is included
+WINDOW = pd.Timedelta(days=WINDOW_DAYS + 1)
+
+
+@dataclass
+class WindowMatches:
+    """The events of every assignment window, as slices of the sorted events.
+
+    Events ``order[lo[i]:hi[i]]`` (positions in the events frame) fall in
+    the window of assignment ``i``.
+    """
+
+    order: np.ndarray
+    lo: np.ndarray
+    hi: np.ndarray
+
+    @property
+    def counts(self) -> np.ndarray:
+        return self.hi - self.lo
+
+    @property
+    def binary(self) -> np.ndarray:
+        return (self.hi > self.lo).astype(np.int8)
+
+    def pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        """(assignment position, event position) of every match."""
+        counts = self.counts
+        assignments = np.repeat(np.arange(len(counts)), counts)
+        # position of each match inside its window
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return assignments, self.order[np.repeat(self.lo, counts) + offsets]
+
+
+def _nanoseconds(values) -> np.ndarray:
+    return np.asarray(values, dtype='datetime64[ns]').view(np.int64)
+
+
+def window_join(
+    events: pd.DataFrame,
+    assignments: pd.DataFrame,
+    window: pd.Timedelta = WINDOW,
+    item: str = 'item_id',
+    time: str = 'event_time',
+    start: str = 'test_start_date',
+) -> WindowMatches:
+    """Match ``events`` to the ``[start, start + window)`` window of each assignment of the same item."""
+    keys, _ = pd.factorize(pd.concat([events[item], assignments[item]], ignore_index=True))
+    event_items, window_items = keys[:len(events)], keys[len(events):]
+    event_times = _nanoseconds(events[time])
+    starts = _nanoseconds(assignments[start])
+    ends = starts + pd.Timedelta(window).value
+    n, m = len(events), len(assignments)
+    # events and the 2m window boundaries in one (item, time) order; at equal times a boundary comes
+    # first, so an event at the start is in the window and one at the end is not
+    items = np.concatenate([event_items, window_items, window_items])
+    times = np.concatenate([event_times, starts, ends])
+    is_event = np.concatenate([np.ones(n, dtype=np.int8), np.zeros(2 * m, dtype=np.int8)])
+    merged = np.lexsort((is_event, times, items))
+    events_before = np.cumsum(is_event[merged]) - is_event[merged]
+    position = np.empty(n + 2 * m, dtype=np.int64)
+    position[merged] = events_before
+    order = merged[is_event[merged] == 1]
+    return WindowMatches(order, position[n:n + m], position[n + m:])
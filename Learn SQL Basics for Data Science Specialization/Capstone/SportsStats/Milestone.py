@@ -88,9 +88,21 @@ import pandas as pd
 import matplotlib
 import numpy as np
 matplotlib.use('module://ipykernel.pylab.backend_inline')
-from ydata_profiling import ProfileReport
-from sqlalchemy import create_engine as ce
-from sqlalchemy import inspect
+from sportsstats.loader import load_athlete_events
+from sportsstats.cache import load_or_build, partition_order
+from sportsstats.enrich import enrich
+from sportsstats.medallion import Layer, MedallionRunner
+from sportsstats.backend import DuckDBBackend, SparkBackend, run_pipeline
+from sportsstats.transfer import GOLD_COLUMNS, extract
+from sportsstats.schema import ATHLETE_EVENTS_SILVER, NOC_REGIONS_SILVER
+from sportsstats.medal_cube import DIMENSIONS, MedalCube
+from sportsstats.profiling import ColumnStatsCache, profile
+from sportsstats.dedup import REPEATED_EVENT_SPORTS
+from sportsstats.nulls import NullIndex
+from sportsstats.impute import impute_grouped_median
+from sportsstats.erd import normalize
+from sportsstats.cleaning import (CleaningPipeline, audit_lengths, drop_columns, find_duplicates, games_redundancy, summary,
+                                  trim_names)
 
 # Set the display option
 pd.set_option('display.max_colwidth', None)
@@ -116,9 +128,12 @@ data_types = {
     'Medal': str
 }
 
-# Read the CSV file
-athlete_events = pd.read_csv('athlete_events.csv', dtype=data_types, quotechar='"', delimiter=',')
-noc_regions = pd.read_csv("noc_regions.csv", quotechar='"', delimiter=',')
+# Read the CSV files, athlete_events in chunks where low-cardinality columns (Sex, Team, NOC, ...) become categoricals,
+# the missing values of every chunk are added to nulls as it is parsed
+def read_sources(nulls=None):
+    athlete_events = load_athlete_events('athlete_events.csv', data_types, chunksize=100_000, nulls=nulls)
+    noc_regions = pd.read_csv("noc_regions.csv", quotechar='"', delimiter=',')
+    return athlete_events, noc_regions
 
 # COMMAND ----------
 
@@ -127,20 +142,51 @@ noc_regions = pd.read_csv("noc_regions.csv", quotechar='"', delimiter=',')
 
 # COMMAND ----------
 
-# merge the data
-df1 = pd.merge(athlete_events, noc_regions, on='NOC', how='left')
+def merge_sources(nulls=None):
+    athlete_events, noc_regions = read_sources(nulls)
 
-# re order the columns
-df1 = df1[['ID', 'Name', 'Sex', 'Age', 'Height', 'Weight', 'Team', 'NOC', 'region', 'notes', 'Games', 'Year', 'Season', 'City', 'Sport', 'Event', 'Medal']]
+    # attach 'region' and 'notes' as 'Region' and 'Notes' right after NOC, without copying athlete_events
+    unmatched_noc = enrich(athlete_events, noc_regions, on='NOC', columns={'region': 'Region', 'notes': 'Notes'})
+    print('NOC without a region:', unmatched_noc.to_dict())
+    if nulls is not None:
+        nulls.add_columns(athlete_events[['Region', 'Notes']])
 
-# rename the 'region' and 'notes' columns to 'Region' and 'Notes'
-df1 = df1.rename(columns={'Name': 'Name_max','region': 'Region', 'notes': 'Notes'})
+    # rename the 'Name' column to 'Name_max'
+    return athlete_events.rename(columns={'Name': 'Name_max'})
+
+# every cleaning step works in place on the frame: no scratch columns (Year2, Name_length, ...) and no copies of the frame
+cleaning = CleaningPipeline([
+    # read-only checks, they share one pass over the frame in chunks of rows
+    games_redundancy('Games', 'Year', 'Season'),
+    audit_lengths({'Name_max': 100}),
+    audit_lengths({'Event': None}),
+    # rows are compared through a 64-bit fingerprint of the source columns (Games, Name_max, ...)
+    find_duplicates('duplicates'),
+    # the same check without the sports where repeated rows can be separate entries of one event
+    find_duplicates('duplicates outside repeated events', sport_keys={sport: None for sport in REPEATED_EVENT_SPORTS}),
+    # changes in place
+    drop_columns(['Games']),
+    trim_names('Name_max', 'Name', max_tokens=2),
+    drop_columns(['Name_max']),
+])
+
+def build_dataset():
+    nulls = NullIndex()
+    frame = merge_sources(nulls)
+    # the cache keeps the rows grouped by Year/Season, put them in that order before the cleaning reports refer to them
+    order = partition_order(frame)
+    frame = frame.take(order).reset_index(drop=True)
+    return frame, {'steps': cleaning.run(frame), 'nulls': nulls.take(order)}
+
+# the merged and cleaned data is cached as Parquet (partitioned by Year/Season) with the cleaning reports,
+# it is only rebuilt when the csv files, data_types or the cleaning steps change
+df1, extras = load_or_build('cache/athlete_events_region', 'athlete_events.csv', 'noc_regions.csv', data_types,
+                            build_dataset, steps=[step.name for step in cleaning.steps])
 
 
 # COMMAND ----------
 
-#create a copy of the df1 
-df = df1.copy()
+df = df1
 
 # COMMAND ----------
 
@@ -167,7 +213,7 @@ df.info()
 
 # COMMAND ----------
 
-# replace 
+# no replace needed: the 'NA' strings are read as missing values when the csv file is loaded
 # df = df.replace({np.nan: None})
 
 # COMMAND ----------
@@ -177,23 +223,16 @@ df.info()
 
 # COMMAND ----------
 
-# split the Game column
-df[['Year2', 'Season2']] = df['Games'].str.split(' ', expand=True)
-
-# COMMAND ----------
-
-#convert the Year2 column 
-df = df.astype({"Year2": 'Int64'})
+# the cleaning ran when the cache was built, its reports are kept with the cached data
+steps = extras['steps']
 
-# COMMAND ----------
-
-#check if this 2 columns are the same
-df['Year'].equals(df['Year2'])
+# time and memory of each step (of the run that built the cache)
+summary(steps)
 
 # COMMAND ----------
 
-#check if this 2 columns are the same
-df['Season'].equals(df['Season2'])
+#check if the Games column is Year + Season, no rows means it is
+df.loc[steps['Games redundancy'].result]
 
 # COMMAND ----------
 
@@ -202,32 +241,22 @@ df['Season'].equals(df['Season2'])
 
 # COMMAND ----------
 
-#drop the columns
-df = df.drop(columns=['Games', 'Year2', 'Season2'])
-
-# COMMAND ----------
-
 # MAGIC %md
 # MAGIC The names of some athletes are too long, so they will be trimmed to only Two.
 
 # COMMAND ----------
 
-# check the Name length
-df['Name_length'] = df['Name_max'].str.len()
-
-# COMMAND ----------
-
 # print the lenght of name to have a better view
-df['Name_length'].unique()
-
-# COMMAND ----------
+name_audit = steps['audit Name_max'].result['Name_max']
+print(name_audit['lengths'])
 
-df[df['Name_length'] > 100]
+# the athletes with a name longer than 100
+df.loc[name_audit['over_limit']]
 
 # COMMAND ----------
 
-# create a new columns and store only max 2 name of each athletes
-df['Name'] = df['Name_max'].str.split().str[:2].str.join(' ')
+# the trimmed names are only for display, these are carried by several athletes (different IDs)
+steps['trim Name_max'].result
 
 # COMMAND ----------
 
@@ -236,11 +265,8 @@ df['Name'] = df['Name_max'].str.split().str[:2].str.join(' ')
 
 # COMMAND ----------
 
-# check the Name length
-df['event_max'] = df['Event'].str.len()
-
-# print the lenght of name to have a better view
-df['event_max'].unique()
+# print the lenght of event to have a better view
+steps['audit Event'].result['Event']['lengths']
 
 # COMMAND ----------
 
@@ -249,32 +275,31 @@ df['event_max'].unique()
 
 # COMMAND ----------
 
-# MAGIC %md
-# MAGIC Drop the column that we added to understand the data. We don’t need it anymore. 
-
-# COMMAND ----------
-
-#drop the columns
-df = df.drop(columns=['event_max', 'Name_max', 'Name_length'])
-
-# COMMAND ----------
-
 # MAGIC %md
 # MAGIC Check duplicate and missing values
 
 # COMMAND ----------
 
-# Check for duplicates
+# Check for duplicates, counted in the cleaning pass
+duplicates = steps['duplicates'].result
 print('1 ) -Shape of dataframe:', df.shape)
-print('2 ) -Total Duplicates:', df.duplicated().sum())
+print('2 ) -Total Duplicates:', duplicates.duplicate_count)
 print('There are many duplicate values in the data, but it’s unclear whether they are truly duplicates.')
 
-# Check for missing values in dataframe
-print('4 ) -Total count of missing values:', df.isna().sum().sum())
+duplicates_outside_repeated_events = steps['duplicates outside repeated events'].result
+print('3 ) -Duplicates outside', ', '.join(REPEATED_EVENT_SPORTS) + ':', duplicates_outside_repeated_events.duplicate_count)
+
+# Check for missing values in dataframe, from the missing-value bitmaps the loader kept while parsing the csv files
+nulls = extras['nulls']
+print('4 ) -Total count of missing values:', nulls.total_missing())
+print('')
+# Display the missing values of Age, Height and Weight that go together
+print('5 ) -Missing Age/Height/Weight combinations:')
+print(nulls.patterns(['Age', 'Height', 'Weight']))
 print('')
 # Display missing values per column in dataframe
-print('5 ) -Missing values per column:')
-df.isna().sum()
+print('6 ) -Missing values per column:')
+nulls.missing_counts()
 
 # COMMAND ----------
 
@@ -300,45 +325,63 @@ df.isna().sum()
 
 # MAGIC %md
 # MAGIC Fill the missing values with the Median
-# MAGIC - change the code to do the median for each column this code fill with the age in the height and weight
+# MAGIC - each column (Age, Height, Weight) is filled with its own median by Sex, Sport and Year, then by Sex and Sport, then by Sex when a group has no value at all
 
 # COMMAND ----------
 
-#cols_to_fill = ['Age', 'Height', 'Weight']
+# fill in place, imputed tells for every cell which level filled it (0 = not imputed)
+imputed = impute_grouped_median(df, ['Age', 'Height', 'Weight'])
 
-# Convert columns to numeric
-#for col in cols_to_fill:
-#    df[col] = pd.to_numeric(df[col], errors='coerce')
+# number of filled values per column
+imputed.astype(bool).sum()
 
-# Now you can fill NA values with the mean
-#mean_values = df.groupby(['Sex', 'Sport'])[cols_to_fill].transform('median')
-#df[cols_to_fill] = df[cols_to_fill].fillna(mean_values)
+# COMMAND ----------
 
+# MAGIC %md
+# MAGIC ### SQL:
 
 # COMMAND ----------
 
-# Define the columns to be filled
-#cols_to_fill = ['Age', 'Height', 'Weight']
+# MAGIC %md
+# MAGIC # Creating Delta Lake
+# MAGIC * Create medallion architecture (bronze, silver, gold) with [Delta Lake](http://delta.io/)
+# MAGIC
+# MAGIC ![](https://files.training.databricks.com/images/davis/delta_multihop.png)
 
-# Calculate the mean for each column grouped by 'Sex' and 'Sport'
-#mean_values = df.groupby(['Sex', 'Sport'])[cols_to_fill].transform('mean')
+# COMMAND ----------
 
-# Fill NA values in df with the calculated mean values
-#df[cols_to_fill] = df[cols_to_fill].fillna(mean_values)
+# MAGIC %md
+# MAGIC Outside Databricks, the same Bronze/Silver/Gold layers are kept as Parquet folders partitioned by Year/Season. A refresh only rewrites the partitions whose rows changed (e.g. a new Games edition) instead of rebuilding every layer.
+
+# COMMAND ----------
 
+athlete_events, noc_regions = read_sources()
+
+athlete_events_medallion = MedallionRunner('medallion', 'athlete_events', [
+    Layer('Bronze'),
+    Layer('Silver', ATHLETE_EVENTS_SILVER.apply),
+    Layer('Gold'),
+])
+noc_regions_medallion = MedallionRunner('medallion', 'noc_regions', [
+    Layer('Bronze'),
+    Layer('Silver', NOC_REGIONS_SILVER.apply),
+    Layer('Gold'),
+], partition_by=())
+
+print(athlete_events_medallion.refresh(athlete_events).written)
+print(noc_regions_medallion.refresh(noc_regions).written)
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC ### SQL:
+# MAGIC The SQL cells below can also run without a cluster: `sportsstats.backend` translates them (USING DELTA, SUBSTRING_INDEX, COUNT(DISTINCT *), ...) and runs them in process on DuckDB, or on SQLite with `SQLAlchemyBackend()`.
 
 # COMMAND ----------
 
-# MAGIC %md
-# MAGIC # Creating Delta Lake
-# MAGIC * Create medallion architecture (bronze, silver, gold) with [Delta Lake](http://delta.io/)
-# MAGIC
-# MAGIC ![](https://files.training.databricks.com/images/davis/delta_multihop.png)
+# run the whole Bronze/Silver/Gold SQL pipeline locally, with the time of each statement
+sql_results, sql_seconds = run_pipeline(DuckDBBackend(), 'athlete_events.csv', 'noc_regions.csv')
+print(sql_results['duplicate_count'])
+sql_seconds
 
 # COMMAND ----------
 
@@ -417,7 +460,7 @@ noc_regions_df.createOrReplaceTempView('noc_regions')
 # MAGIC
 # MAGIC <img width="75px" src="https://files.training.databricks.com/images/davis/images_silver.png">
 # MAGIC
-# MAGIC Clean and Filter unnecessary columns and nulls.
+# MAGIC Clean and Filter unnecessary columns and nulls. The Silver columns are declared in `sportsstats.schema` (`ATHLETE_EVENTS_SILVER.select_sql('athlete_events_Bronze')` prints the statement below): the redundant 'Games' column is never read, so the table does not need column mapping to drop it afterwards.
 
 # COMMAND ----------
 
@@ -434,7 +477,6 @@ noc_regions_df.createOrReplaceTempView('noc_regions')
 # MAGIC     CAST(Weight AS float) AS Weight,
 # MAGIC     CAST(Team AS string) AS Team,
 # MAGIC     CAST(NOC AS string) AS NOC,
-# MAGIC     CAST(Games AS string) AS Games,
 # MAGIC     CAST(Year AS int) AS Year,
 # MAGIC     CAST(Season AS string) AS Season,
 # MAGIC     CAST(City AS string) AS City,
@@ -481,7 +523,8 @@ noc_regions_df.createOrReplaceTempView('noc_regions')
 # MAGIC         CAST(SUBSTRING_INDEX(Games, ' ', 1) AS int) AS Games_Year, 
 # MAGIC         SUBSTRING_INDEX(Games, ' ', -1) AS Games_Season,
 # MAGIC         Season
-# MAGIC FROM athlete_events_Silver;
+# MAGIC -- only the distinct (Games, Year, Season) combinations are split, not every row
+# MAGIC FROM (SELECT DISTINCT Games, Year, Season FROM athlete_events_Bronze);
 # MAGIC
 # MAGIC SELECT * FROM temp_Games_concat LIMIT 10;
 
@@ -511,34 +554,6 @@ noc_regions_df.createOrReplaceTempView('noc_regions')
 
 # COMMAND ----------
 
-# MAGIC %md
-# MAGIC  Delta table doesn’t support the DROP COLUMN operation because Column Mapping is not enabled. You can enable Column Mapping on your Delta table with mapping mode ‘name’ 
-
-# COMMAND ----------
-
-# MAGIC %sql
-# MAGIC
-# MAGIC -- This command alters the properties of the 'athlete_events_Silver' table.
-# MAGIC ALTER TABLE athlete_events_Silver SET TBLPROPERTIES (
-# MAGIC    -- Enables column mapping with 'name' mode. This allows operations like adding, dropping, and renaming columns.
-# MAGIC    'delta.columnMapping.mode' = 'name',
-# MAGIC    
-# MAGIC    -- Sets the minimum reader version to '2'. This means that the table can only be read by Delta Lake version 0.2.0 and above.
-# MAGIC    'delta.minReaderVersion' = '2',
-# MAGIC    
-# MAGIC    -- Sets the minimum writer version to '5'. This means that the table can only be written by Delta Lake version 0.5.0 and above.
-# MAGIC    'delta.minWriterVersion' = '5'
-# MAGIC )
-# MAGIC
-
-# COMMAND ----------
-
-# MAGIC %sql
-# MAGIC -- Delete the 'Games' column
-# MAGIC ALTER TABLE athlete_events_Silver DROP COLUMNS (Games)
-
-# COMMAND ----------
-
 # MAGIC %sql
 # MAGIC SELECT * FROM athlete_events_Silver
 
@@ -652,10 +667,13 @@ noc_regions_df.createOrReplaceTempView('noc_regions')
 # COMMAND ----------
 
 
-df1 = sql(""" SELECT at.ID, at.Name, at.Sex, at.Age, at.Height, at.Weight, at.Team, at.NOC, nr.Region, nr.Note, at.Year, at.Season, at.City, at.Sport, at.Event, at.Medal
-FROM athlete_events_Gold at
-LEFT JOIN noc_regions_Gold nr ON at.NOC = nr.NOC""").toPandas()
-df = df1.replace('NA', None)
+# the join runs in Spark with 'NA' already turned into NULL, the rows come back one partition at a time as Arrow batches
+# (low-cardinality text columns as categoricals)
+spark_backend = SparkBackend(spark)
+
+# the profile, describe and the star schema below read every column of every row
+df1 = extract(spark_backend, columns=list(GOLD_COLUMNS))
+df = df1
 
 # COMMAND ----------
 
@@ -663,9 +681,13 @@ df.head()
 
 # COMMAND ----------
 
- from ydata_profiling import ProfileReport
- #ProfileReport
- ProfileReport(df)
+# per-column statistics, cached by column content: only the columns that changed since the last run are recomputed
+ColumnStatsCache('profile_stats.json').stats(df)
+
+# COMMAND ----------
+
+#ProfileReport on a sample stratified by Sport and Season, tier='minimal' skips correlations and interactions, tier='full' is ProfileReport(df)
+profile(df, tier='sampled')
 
 # COMMAND ----------
 
@@ -687,21 +709,22 @@ df.head()
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC Top 10 Region with the most Medal
+# MAGIC Count the medals once by Region, NOC, athlete, Year, Season, Sport and Event. Every table below is read from these counts instead of scanning the whole dataframe again.
 
 # COMMAND ----------
 
-# Create the pivot table
-pivot_table = df.pivot_table(values='ID', index='Region', columns='Medal', aggfunc='count')
+# only the medal rows and the cube's columns are extracted
+medal_cube = MedalCube.from_frame(extract(spark_backend, columns=[*DIMENSIONS, 'Medal'], where='Medal IS NOT NULL'))
 
-# Calculate the total medals for each region
-total_medals = pivot_table.sum(axis=1).sort_values(ascending=False)
+# COMMAND ----------
 
-# Reorder the rows of the pivot table based on total_medals
-pivot_table = pivot_table.reindex(total_medals.index)
+# MAGIC %md
+# MAGIC Top 10 Region with the most Medal
+
+# COMMAND ----------
 
 # top 10 of the region with the most medal
-pivot_table.head(10)
+medal_cube.top('Region', 10)
 
 # COMMAND ----------
 
@@ -715,17 +738,8 @@ pivot_table.head(10)
 
 # COMMAND ----------
 
-# Create the pivot table
-pivot_table = df.pivot_table(values='ID', index='Name', columns='Medal', aggfunc='count')
-
-# Calculate the total medals for each region
-total_medals = pivot_table.sum(axis=1).sort_values(ascending=False)
-
-# Reorder the rows of the pivot table based on total_medals
-pivot_table = pivot_table.reindex(total_medals.index)
-
-# top 10 of the region with the most medal
-pivot_table.head(20)
+# top 20 of the athletes with the most medal, grouped by ID so that athletes sharing a name stay apart
+medal_cube.top(['ID', 'Name'], 20)
 
 # COMMAND ----------
 
@@ -744,36 +758,14 @@ pivot_table.head(20)
 
 # COMMAND ----------
 
-# Create the pivot table
-pivot_table = df.pivot_table(values='ID', index=['Name', 'Year'], columns='Medal', aggfunc='count')
-
-# Calculate the total medals for each athlete and year
-total_medals = pivot_table.sum(axis=1).sort_values(ascending=False)
-
-# Reorder the rows of the pivot table based on total_medals
-pivot_table = pivot_table.reindex(total_medals.index)
-
 # Display the top 20 athletes and years with the most medals
-pivot_table.head(20)
+medal_cube.top(['ID', 'Name', 'Year'], 20)
 
 
 # COMMAND ----------
 
-# Filter the dataframe for only 'Gold' medals
-df_gold = df[df['Medal'] == 'Gold']
-
-# Create the pivot table
-pivot_table_gold = df_gold.pivot_table(values='ID', index=['Name', 'Year'], aggfunc='count')
-
-# Calculate the total gold medals for each athlete and year
-total_gold_medals = pivot_table_gold.sum(axis=1).sort_values(ascending=False)
-
-# Reorder the rows of the pivot table based on total_gold_medals
-pivot_table_gold = pivot_table_gold.reindex(total_gold_medals.index)
-
 # Display the top 20 athletes and years with the most gold medals
-pivot_table_gold = pivot_table_gold.rename(columns={'ID': 'Gold'})
-pivot_table_gold.head(20)
+medal_cube.top(['ID', 'Name', 'Year'], 20, medal='Gold')
 
 
 # COMMAND ----------
@@ -802,22 +794,27 @@ df.head()
 
 # COMMAND ----------
 
-# Fact Table: Competitions
-df_competitions = df1[['Year', 'Season', 'City', 'Sport', 'Event', 'Medal']].copy()
-df_competitions.insert(0, 'Competition_ID', range(1, 1 + len(df_competitions)))
+# Star schema: each dimension keeps one row per distinct athlete, team, Games and event with an integer key
+star = normalize(df1)
 
-# Dimension Tables
-df_athletes = df1[['ID', 'Name', 'Sex', 'Age', 'Height', 'Weight']]
-df_teams = df1[['ID', 'Team', 'NOC', 'Region', 'Note']]
+# Fact Table: Competitions, the dimension keys, Age/Height/Weight at those Games and the Medal
+df_competitions = star.results
 
-# Add Athlete_ID to Competitions table
-df_competitions['Athlete_ID'] = df1['ID']
+# Dimension Tables
+df_athletes = star.dimensions['athletes']
+df_teams = star.dimensions['teams']
+df_games = star.dimensions['games']
+df_events = star.dimensions['events']
 
 
 # COMMAND ----------
 
 # MAGIC %md
-# MAGIC Save the result as csv
+# MAGIC Save the result as parquet
+
+# COMMAND ----------
+
+star.write('erd')
 
 # COMMAND ----------
 
@@ -836,6 +833,14 @@ display(df_teams)
 
 # COMMAND ----------
 
+display(df_games)
+
+# COMMAND ----------
+
+display(df_events)
+
+# COMMAND ----------
+
 # MAGIC %md
 # MAGIC
 # MAGIC ![ERDs](/files/tables/ERDs-1.png)
@@ -0,0 +1 @@
+"""Helpers for the SportsStats milestone notebook (Milestone.py)."""
@@ -0,0 +1,386 @@
+"""Run the notebook's medallion SQL on an embedded engine.
+
+Every statement of the Bronze/Silver/Gold pipeline runs in ``%sql`` cells or
+``spark.sql`` on Databricks, so even a quick check needs a cluster. A
+backend executes the same statements in process, on DuckDB or on any
+SQLAlchemy engine (SQLite by default). :func:`translate` rewrites the Spark
+SQL they use: ``USING DELTA``, ``SUBSTRING_INDEX``, ``COUNT(DISTINCT *)``,
+``CREATE OR REPLACE`` for SQLite, and Databricks-only statements
+(``CREATE DATABASE``, ``USE``, ``ALTER TABLE ... TBLPROPERTIES``,
+``DESCRIBE HISTORY``) which are skipped.
+
+Both engines are imported lazily, only the backend in use has to be
+installed. :class:`SparkBackend` wraps a Spark session so that the same
+code, :meth:`Backend.record_batches` in particular, also runs on Databricks.
+Every backend streams :meth:`Backend.record_batches`: DuckDB through an
+Arrow reader, SQLAlchemy through a server-side cursor, Spark one partition
+at a time.
+"""
+from __future__ import annotations
+
+import re
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterable, Iterator
+
+import pandas as pd
+import pyarrow as pa
+
+from sportsstats.nulls import NULL_SENTINELS
+from sportsstats.schema import ATHLETE_EVENTS_SILVER, NOC_REGIONS_SILVER
+
+DIALECTS = ('spark', 'duckdb', 'sqlite')
+
+DEFAULT_BATCH_ROWS = 65_536
+
+# Databricks statements that have no local equivalent and nothing to do
+_SKIPPED = re.compile(
+    r'^\s*(CREATE\s+(DATABASE|SCHEMA)\b|USE\b|DESCRIBE\s+HISTORY\b|ALTER\s+TABLE\b.*\bTBLPROPERTIES\b)',
+    re.IGNORECASE | re.DOTALL,
+)
+_CREATE_OR_REPLACE = re.compile(
+    r'^\s*CREATE\s+OR\s+REPLACE\s+(TEMPORARY\s+VIEW|TEMP\s+VIEW|VIEW|TABLE)\s+(\w+)', re.IGNORECASE,
+)
+_QUERY = re.compile(r'^\s*(SELECT|WITH|VALUES|DESCRIBE|SHOW|PRAGMA)\b', re.IGNORECASE)
+
+
+def split_statements(script: str) -> list[str]:
+    """Split a ``%sql`` cell on ``;``, ignoring quoted text and ``--`` comments."""
+    statements, current, quote, i = [], [], None, 0
+    while i < len(script):
+        char = script[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"`':
+            quote = char
+        elif script.startswith('--', i):
+            end = script.find('\n', i)
+            i = len(script) if end < 0 else end
+            continue
+        elif char == ';':
+            statements.append(''.join(current))
+            current = []
+            i += 1
+            continue
+        current.append(char)
+        i += 1
+    statements.append(''.join(current))
+    return [statement.strip() for statement in statements if statement.strip()]
+
+
+def _call_arguments(sql: str, start: int) -> tuple[list[str], int]:
+    """Top-level arguments of the call whose ``(`` is at ``start``, and the index after ``)``."""
+    arguments, depth, quote, begin = [], 0, None, start + 1
+    for i in range(start, len(sql)):
+        char = sql[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+            if depth == 0:
+                arguments.append(sql[begin:i].strip())
+                return arguments, i + 1
+        elif char == ',' and depth == 1:
+            arguments.append(sql[begin:i].strip())
+            begin = i + 1
+    raise ValueError(f'unbalanced parentheses in: {sql}')
+
+
+def _substring_index(value: str, delimiter: str, count: str, dialect: str) -> str:
+    if count not in ('1', '-1'):
+        raise ValueError(f'SUBSTRING_INDEX is only translated for a count of 1 or -1, got {count}')
+    if dialect == 'duckdb':
+        return f'split_part({value}, {delimiter}, {count})'
+    if count == '1':
+        return (f'CASE WHEN instr({value}, {delimiter}) = 0 THEN {value} '
+                f'ELSE substr({value}, 1, instr({value}, {delimiter}) - 1) END')
+    if len(delimiter) != 3:
+        raise ValueError('SUBSTRING_INDEX(..., -1) is only translated for a one-character delimiter on sqlite')
+    # everything after the last delimiter: strip the trailing non-delimiter characters off, remove that prefix
+    return f'replace({value}, rtrim({value}, replace({value}, {delimiter}, \'\')), \'\')'
+
+
+def _rewrite_calls(sql: str, dialect: str) -> str:
+    pattern = re.compile(r'\bSUBSTRING_INDEX\s*\(', re.IGNORECASE)
+    match = pattern.search(sql)
+    while match:
+        arguments, end = _call_arguments(sql, match.end() - 1)
+        if len(arguments) != 3:
+            raise ValueError(f'SUBSTRING_INDEX takes 3 arguments: {sql[match.start():end]}')
+        arguments[0] = _rewrite_calls(arguments[0], dialect)
+        replacement = _substring_index(*arguments, dialect)
+        sql = sql[:match.start()] + replacement + sql[end:]
+        match = pattern.search(sql, match.start() + len(replacement))
+    return sql
+
+
+def translate(sql: str, dialect: str) -> list[str]:
+    """Rewrite one Spark SQL statement for ``dialect``.
+
+    Returns the statements to run in its place: none for skipped statements,
+    two for a ``CREATE OR REPLACE`` on SQLite.
+    """
+    if dialect not in DIALECTS:
+        raise ValueError(f'dialect must be one of {DIALECTS}, got {dialect!r}')
+    if dialect == 'spark':
+        return [sql]
+    if _SKIPPED.match(sql):
+        return []
+    sql = re.sub(r'\bUSING\s+DELTA\b', '', sql, flags=re.IGNORECASE)
+    sql = _rewrite_calls(sql, dialect)
+    if re.search(r'COUNT\s*\(\s*DISTINCT\s+\*\s*\)', sql, re.IGNORECASE):
+        tables = re.findall(r'\bFROM\s+(\w+)', sql, re.IGNORECASE)
+        if len(set(tables)) != 1:
+            raise ValueError('COUNT(DISTINCT *) is only translated for a single-table query')
+        sql = re.sub(r'COUNT\s*\(\s*DISTINCT\s+\*\s*\)',
+                     f'(SELECT COUNT(*) FROM (SELECT DISTINCT * FROM {tables[0]}) AS distinct_rows)',
+                     sql, flags=re.IGNORECASE)
+    if dialect == 'duckdb':
+        return [sql]
+    sql = re.sub(r'\bAS\s+string\b', 'AS TEXT', sql, flags=re.IGNORECASE)
+    describe = re.match(r'^\s*DESCRIBE\s+(\w+)\s*$', sql, re.IGNORECASE)
+    if describe:
+        return [f'PRAGMA table_info({describe.group(1)})']
+    replace = _CREATE_OR_REPLACE.match(sql)
+    if replace:
+        kind, name = replace.groups()
+        view = 'VIEW' in kind.upper()
+        create = 'CREATE TEMP VIEW' if 'TEMP' in kind.upper() else f'CREATE {"VIEW" if view else "TABLE"}'
+        return [f'DROP {"VIEW" if view else "TABLE"} IF EXISTS {name}', f'{create} {name}' + sql[replace.end():]]
+    return [sql]
+
+
+def _or_empty(batches: Iterable[pa.RecordBatch], schema: pa.Schema) -> Iterator[pa.RecordBatch]:
+    """``batches``, or a single empty batch of ``schema`` when there are none."""
+    empty = True
+    for batch in batches:
+        empty = False
+        yield batch
+    if empty:
+        yield pa.RecordBatch.from_pylist([], schema=schema)
+
+
+class Backend(ABC):
+    """Runs Spark SQL statements on a local engine, translated for its dialect."""
+
+    dialect = 'spark'
+
+    @abstractmethod
+    def execute(self, sql: str) -> pd.DataFrame | None:
+        """Run one engine-native statement, returning its rows if it has any."""
+
+    @abstractmethod
+    def load_csv(self, table: str, path, sentinels: Iterable[str] = NULL_SENTINELS) -> None:
+        """Create ``table`` from a CSV file, every column as text like a raw upload."""
+
+    def run(self, script: str) -> pd.DataFrame | None:
+        """Run a ``%sql`` cell and return the rows of its last query, like the notebook."""
+        result = None
+        for statement in split_statements(script):
+            for native in translate(statement, self.dialect):
+                rows = self.execute(native)
+                if rows is not None:
+                    result = rows
+        return result
+
+    def record_batches(self, sql: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+        """Rows of the query ``sql`` as Arrow record batches of up to ``batch_rows`` rows.
+
+        An empty result is one empty batch, so that it still carries the
+        columns and types of the result. This fallback builds the whole
+        result first, the engines override it to stream.
+        """
+        table = pa.Table.from_pandas(self.execute(sql), preserve_index=False)
+        yield from _or_empty(table.to_batches(batch_rows), table.schema)
+
+
+class DuckDBBackend(Backend):
+    dialect = 'duckdb'
+
+    def __init__(self, database: str = ':memory:'):
+        import duckdb
+
+        self.connection = duckdb.connect(database)
+
+    def execute(self, sql: str) -> pd.DataFrame | None:
+        cursor = self.connection.execute(sql)
+        # DuckDB also returns a row count for CREATE TABLE AS, only queries have rows to show
+        return cursor.df() if _QUERY.match(sql) else None
+
+    def record_batches(self, sql: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+        reader = self.connection.execute(sql).to_arrow_reader(batch_rows)
+        yield from _or_empty(reader, reader.schema)
+
+    def load_csv(self, table: str, path, sentinels: Iterable[str] = NULL_SENTINELS) -> None:
+        self.connection.execute(
+            f'CREATE OR REPLACE TABLE {table} AS SELECT * FROM read_csv(?, header = true, all_varchar = true, nullstr = ?)',
+            [str(path), list(sentinels)],
+        )
+
+
+class SQLAlchemyBackend(Backend):
+    """Any SQLAlchemy engine; the dialect is taken from the engine (``sqlite`` by default)."""
+
+    def __init__(self, url: str = 'sqlite://'):
+        from sqlalchemy import create_engine
+
+        self.engine = create_engine(url)
+        self.dialect = self.engine.dialect.name
+        if self.dialect not in DIALECTS:
+            raise ValueError(f'no SQL translation for the {self.dialect} dialect')
+
+    def execute(self, sql: str) -> pd.DataFrame | None:
+        with self.engine.begin() as connection:
+            cursor = connection.exec_driver_sql(sql)
+            if not cursor.returns_rows:
+                return None
+            return pd.DataFrame(cursor.fetchall(), columns=list(cursor.keys()))
+
+    def record_batches(self, sql: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+        with self.engine.connect() as connection:
+            cursor = connection.execution_options(stream_results=True).exec_driver_sql(sql)
+            columns = list(cursor.keys())
+            # the type of a column is fixed by its first non-NULL batch, later batches are built with it
+            types: dict[str, pa.DataType] = {}
+
+            def batches() -> Iterator[pa.RecordBatch]:
+                while rows := cursor.fetchmany(batch_rows):
+                    arrays = [pa.array(values, types.get(column)) for column, values in zip(columns, zip(*rows))]
+                    for column, values in zip(columns, arrays):
+                        if not pa.types.is_null(values.type):
+                            types.setdefault(column, values.type)
+                    yield pa.RecordBatch.from_arrays(arrays, names=columns)
+
+            # the driver reports no column types, an empty result only keeps the names
+            yield from _or_empty(batches(), pa.schema([(column, pa.null()) for column in columns]))
+
+    def load_csv(self, table: str, path, sentinels: Iterable[str] = NULL_SENTINELS, chunksize: int = 50_000) -> None:
+        with self.engine.begin() as connection:
+            for number, chunk in enumerate(pd.read_csv(path, dtype=str, keep_default_na=False,
+                                                       na_values=list(sentinels), chunksize=chunksize)):
+                chunk.to_sql(table, connection, if_exists='replace' if number == 0 else 'append', index=False)
+
+
+class SparkBackend(Backend):
+    """A Spark session; statements run unchanged, the tables come from Databricks."""
+
+    dialect = 'spark'
+
+    def __init__(self, session):
+        self.session = session
+
+    def execute(self, sql: str) -> pd.DataFrame | None:
+        frame = self.session.sql(sql)
+        return frame.toPandas() if _QUERY.match(sql) else None
+
+    def load_csv(self, table: str, path, sentinels: Iterable[str] = NULL_SENTINELS) -> None:
+        """Register ``table`` as a temporary view over the CSV file (a DBFS path on Databricks).
+
+        A field equal to one of ``sentinels``, quoted or not, is NULL; the
+        same list DuckDB gets as ``nullstr`` and the SQLite loader as
+        ``na_values``. Empty fields are only NULL when ``''`` is listed.
+        """
+        from pyspark.sql import functions as F
+
+        # the reader's nullValue option takes a single string and defaults to '', so it is kept out of the way
+        # (emptyValue reads empty fields as ''), and the sentinels are matched below like the other backends do
+        frame = self.session.read.csv(str(path), header=True, inferSchema=False, quote='"', escape='"',
+                                      nullValue='\u0000', emptyValue='')
+        sentinels = list(sentinels)
+        if sentinels:
+            frame = frame.select([
+                F.when(frame[column].isin(sentinels), None).otherwise(frame[column]).alias(column)
+                for column in frame.columns
+            ])
+        frame.createOrReplaceTempView(table)
+
+    def record_batches(self, sql: str, batch_rows: int = DEFAULT_BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+        """Stream the result to the driver one partition at a time, as Arrow.
+
+        Each executor converts its partition to Arrow (``mapInArrow``) and
+        serializes it as Arrow IPC streams of up to ``batch_rows`` rows, one
+        binary row per batch. ``toLocalIterator`` then fetches those rows
+        one partition at a time, and the driver only decodes them: it never
+        holds more than one partition, and builds no Python ``Row`` per
+        record.
+        """
+        from pyspark.sql.pandas.types import to_arrow_schema
+        from pyspark.sql.types import BinaryType, StructField, StructType
+
+        frame = self.session.sql(sql)
+
+        def serialize(batches: Iterator[pa.RecordBatch]) -> Iterator[pa.RecordBatch]:
+            batches = list(batches)
+            if not batches:
+                return
+            for batch in pa.Table.from_batches(batches).combine_chunks().to_batches(batch_rows):
+                sink = pa.BufferOutputStream()
+                with pa.ipc.new_stream(sink, batch.schema) as writer:
+                    writer.write_batch(batch)
+                yield pa.RecordBatch.from_arrays([pa.array([sink.getvalue().to_pybytes()], pa.binary())], names=['batch'])
+
+        serialized = frame.mapInArrow(serialize, StructType([StructField('batch', BinaryType())]))
+
+        def batches() -> Iterator[pa.RecordBatch]:
+            for row in serialized.toLocalIterator(prefetchPartitions=False):
+                yield from pa.ipc.open_stream(row.batch)
+
+        yield from _or_empty(batches(), to_arrow_schema(frame.schema))
+
+
+# the notebook's medallion cells, in order; Silver comes from the declared schemas
+PIPELINE = {
+    'athlete_events_Bronze': 'CREATE OR REPLACE TABLE athlete_events_Bronze USING DELTA AS SELECT * FROM athlete_events',
+    'noc_regions_Bronze': 'CREATE OR REPLACE TABLE noc_regions_Bronze USING DELTA AS SELECT * FROM noc_regions',
+    'athlete_events_Silver': 'CREATE OR REPLACE TABLE athlete_events_Silver USING DELTA AS '
+                             + ATHLETE_EVENTS_SILVER.select_sql('athlete_events_Bronze'),
+    'noc_regions_Silver': 'CREATE OR REPLACE TABLE noc_regions_Silver USING DELTA AS '
+                          + NOC_REGIONS_SILVER.select_sql('noc_regions_Bronze'),
+    'temp_Games_concat': """CREATE OR REPLACE TEMPORARY VIEW temp_Games_concat AS
+SELECT Year,
+       CAST(SUBSTRING_INDEX(Games, ' ', 1) AS int) AS Games_Year,
+       SUBSTRING_INDEX(Games, ' ', -1) AS Games_Season,
+       Season
+FROM (SELECT DISTINCT Games, Year, Season FROM athlete_events_Bronze) AS games""",
+    'games_mismatch': """SELECT * FROM temp_Games_concat
+WHERE CAST(Year AS int) <> Games_Year OR Season <> Games_Season""",
+    'row_count': 'SELECT COUNT(*) AS NumberOfRows FROM athlete_events_Silver',
+    'duplicate_count': 'SELECT COUNT(*) - COUNT(DISTINCT *) AS NumberOfDuplicates FROM athlete_events_Silver',
+    'missing_counts': 'SELECT ' + ', '.join(f'COUNT(*) - COUNT({column.name}) AS {column.name}'
+                                             for column in ATHLETE_EVENTS_SILVER.columns)
+                      + ' FROM athlete_events_Silver',
+    'athlete_events_Gold': 'CREATE OR REPLACE TABLE athlete_events_Gold USING DELTA AS SELECT * FROM athlete_events_Silver',
+    'noc_regions_Gold': 'CREATE OR REPLACE TABLE noc_regions_Gold USING DELTA AS SELECT * FROM noc_regions_Silver',
+    # the notebook's alias 'at' is a reserved word in DuckDB
+    'gold_join': """SELECT ae.ID, ae.Name, ae.Sex, ae.Age, ae.Height, ae.Weight, ae.Team, ae.NOC, nr.Region, nr.Note,
+       ae.Year, ae.Season, ae.City, ae.Sport, ae.Event, ae.Medal
+FROM athlete_events_Gold ae
+LEFT JOIN noc_regions_Gold nr ON ae.NOC = nr.NOC""",
+}
+
+
+def run_pipeline(backend: Backend, athlete_path='athlete_events.csv', noc_path='noc_regions.csv') -> tuple[dict, pd.Series]:
+    """Load both CSV files and run :data:`PIPELINE` on ``backend``.
+
+    Returns the rows of every query statement by name, and the seconds each
+    statement took (the loads included).
+    """
+    seconds = {}
+    for table, path in (('athlete_events', athlete_path), ('noc_regions', noc_path)):
+        start = time.perf_counter()
+        backend.load_csv(table, path)
+        seconds[f'load {table}'] = time.perf_counter() - start
+    results = {}
+    for name, sql in PIPELINE.items():
+        start = time.perf_counter()
+        rows = backend.run(sql)
+        seconds[name] = time.perf_counter() - start
+        if rows is not None:
+            results[name] = rows
+    return results, pd.Series(seconds, name='seconds')
@@ -0,0 +1,91 @@
+"""Small benchmarks comparing the notebook's code paths with the helpers.
+
+Run from the SportsStats folder, next to the data files::
+
+    python -m sportsstats.bench athlete_events.csv
+
+Each path runs in a fresh interpreter and reports that process's peak RSS
+(``ru_maxrss``). Unlike ``tracemalloc`` this counts every buffer: the
+parser's scratch space and the Arrow memory pool behind the ``str`` columns
+of pandas 3 included. The ``interpreter`` row is the peak RSS of a process
+that only imports this module, the baseline to subtract.
+"""
+from __future__ import annotations
+
+import multiprocessing
+import resource
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from sportsstats.loader import DEFAULT_CHUNKSIZE, load_athlete_events
+
+# same map as the notebook's data_types cell
+DATA_TYPES = {
+    'ID': 'Int64',
+    'Name': str,
+    'Sex': str,
+    'Age': 'Int64',
+    'Height': 'Int64',
+    'Weight': float,
+    'Team': str,
+    'NOC': str,
+    'Games': str,
+    'Year': 'Int64',
+    'Season': str,
+    'City': str,
+    'Sport': str,
+    'Event': str,
+    'Medal': str,
+}
+
+
+def _peak_rss_bytes() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _run(func: Callable, args: tuple) -> tuple[float, int, int | None]:
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    size = int(result.memory_usage(deep=True).sum()) if isinstance(result, pd.DataFrame) else None
+    return seconds, _peak_rss_bytes(), size
+
+
+def _noop() -> None:
+    return None
+
+
+def measure(label: str, func: Callable, *args) -> dict:
+    """Run ``func(*args)`` in a fresh process, for its wall time and peak RSS.
+
+    ``func`` and ``args`` must be picklable (module-level functions).
+    """
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        seconds, peak, size = pool.submit(_run, func, args).result()
+    row = {'path': label, 'seconds': round(seconds, 3), 'peak_rss_mb': round(peak / 2**20, 1)}
+    if size is not None:
+        row['result_mb'] = round(size / 2**20, 1)
+    return row
+
+
+def _read_csv(path) -> pd.DataFrame:
+    return pd.read_csv(path, dtype=DATA_TYPES, quotechar='"', delimiter=',')
+
+
+def bench_loader(path, chunksize: int = DEFAULT_CHUNKSIZE) -> pd.DataFrame:
+    """Compare the single ``pd.read_csv`` call with the chunked loader."""
+    return pd.DataFrame([
+        measure('interpreter', _noop),
+        measure('read_csv', _read_csv, path),
+        measure(f'load_athlete_events({chunksize})', load_athlete_events, path, DATA_TYPES, chunksize),
+    ])
+
+
+if __name__ == '__main__':
+    print(bench_loader(sys.argv[1] if len(sys.argv) > 1 else 'athlete_events.csv').to_string(index=False))
@@ -0,0 +1,160 @@
+"""Columnar cache for the merged and cleaned athlete_events_region dataset.
+
+The merged and cleaned frame is written once as a Parquet dataset partitioned
+by Year/Season, under a directory named after a content hash of the two
+source CSVs, the ``data_types`` schema and the names of the cleaning steps.
+Later runs memory-map the cached files instead of re-parsing the CSVs and
+redoing the merge and the cleaning. Any change to a source file, to the
+schema or to the cleaning produces a new key, so stale entries are never
+read. The frame is put in partition order (:func:`partition_order`) before
+it is cleaned and written, so the files hold it as it was built and reads
+need no reordering. What the build reports besides the frame (cleaning
+reports, the missing-value index, ...) is pickled next to the files.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import uuid
+from collections.abc import Callable, Iterable, Mapping
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+PARTITION_COLUMNS = ('Year', 'Season')
+
+# partition values only live in directory names, so their types are declared
+PARTITIONING = ds.partitioning(
+    pa.schema([('Year', pa.int64()), ('Season', pa.string())]),
+    flavor='hive',
+)
+
+# part of the cache key, bumped when the layout of an entry changes
+CACHE_VERSION = 4
+
+# marker written last, a cache entry without it is incomplete
+_COMPLETE = '_SUCCESS'
+
+# pickled extras of the build, the leading underscore keeps pyarrow from reading it as data
+_EXTRAS = '_extras.pickle'
+
+
+def _schema_token(data_types: Mapping[str, object]) -> str:
+    names = {column: getattr(kind, '__name__', str(kind)) for column, kind in data_types.items()}
+    return json.dumps(names, sort_keys=True)
+
+
+def cache_key(
+    athlete_events_path,
+    noc_regions_path,
+    data_types: Mapping[str, object],
+    steps: Iterable[str] = (),
+) -> str:
+    """Hash the content of both source files plus the schema and the cleaning ``steps``."""
+    digest = hashlib.sha256()
+    for path in (athlete_events_path, noc_regions_path):
+        with open(path, 'rb') as handle:
+            for block in iter(lambda: handle.read(1 << 20), b''):
+                digest.update(block)
+        digest.update(b'\0')
+    digest.update(_schema_token(data_types).encode())
+    digest.update(json.dumps(list(steps)).encode())
+    digest.update(f'v{CACHE_VERSION}'.encode())
+    return digest.hexdigest()[:32]
+
+
+def partition_order(frame: pd.DataFrame, partition_cols=PARTITION_COLUMNS) -> np.ndarray:
+    """Positions that sort ``frame`` by partition, in the order the dataset is read back.
+
+    Partitions are read in the order of their ``Year=.../Season=...``
+    directory names, so the values are compared as text. The sort is stable:
+    rows keep their order within a partition.
+    """
+    keys = [frame[column].astype(str).to_numpy() for column in reversed(partition_cols)]
+    return np.lexsort(keys)
+
+
+def write_cache(frame: pd.DataFrame, directory, partition_cols=PARTITION_COLUMNS, extras=None) -> Path:
+    """Write ``frame`` as a partitioned Parquet dataset at ``directory``.
+
+    ``frame`` must already be in :func:`partition_order`, so that reading
+    the dataset gives back its rows in the same order. ``extras``, if given,
+    is pickled into the entry. The dataset is written next to its final
+    location and renamed into place, so readers never see a half-written
+    entry.
+    """
+    order = partition_order(frame, partition_cols)
+    if (order != np.arange(len(frame))).any():
+        raise ValueError(f'frame is not sorted by {list(partition_cols)}, reorder it with partition_order first')
+    directory = Path(directory)
+    staging = directory.with_name(f'.{directory.name}.{uuid.uuid4().hex}')
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    pq.write_to_dataset(table, staging, partition_cols=list(partition_cols), preserve_order=True)
+    if extras is not None:
+        with open(staging / _EXTRAS, 'wb') as handle:
+            pickle.dump(extras, handle, protocol=pickle.HIGHEST_PROTOCOL)
+    (staging / _COMPLETE).touch()
+    try:
+        os.replace(staging, directory)
+    except OSError:
+        # another run won the race, keep its entry
+        shutil.rmtree(staging, ignore_errors=True)
+    return directory
+
+
+def read_cache(directory, columns=None, filter=None) -> pd.DataFrame:
+    """Memory-map the cached dataset at ``directory`` back into pandas.
+
+    ``columns`` and ``filter`` (a ``pyarrow.compute`` expression, e.g.
+    ``pc.field('Season') == 'Winter'``) are pushed into the scan, so pruned
+    partitions and columns are never read. Rows come back in the order they
+    were written, with a fresh RangeIndex.
+    """
+    table = pq.read_table(directory, columns=columns, filters=filter, memory_map=True, partitioning=PARTITIONING)
+    # partition columns come back last, put them where they were written (no copy, only the schema changes)
+    written = [column['name'] for column in (table.schema.pandas_metadata or {}).get('columns', [])]
+    order = [name for name in written if name in table.column_names]
+    if len(order) == table.num_columns:
+        table = table.select(order)
+    frame = table.to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+    if 'Season' in frame:
+        frame['Season'] = frame['Season'].astype('category')
+    return frame
+
+
+def read_extras(directory):
+    """The extras pickled into the cache entry at ``directory``, ``None`` if there are none."""
+    path = Path(directory) / _EXTRAS
+    if not path.exists():
+        return None
+    with open(path, 'rb') as handle:
+        return pickle.load(handle)
+
+
+def load_or_build(
+    cache_dir,
+    athlete_events_path,
+    noc_regions_path,
+    data_types: Mapping[str, object],
+    build: Callable[[], tuple[pd.DataFrame, object]],
+    steps: Iterable[str] = (),
+) -> tuple[pd.DataFrame, object]:
+    """Return the cached frame and extras, calling ``build`` only on a cache miss.
+
+    ``build`` returns the merged and cleaned frame, in :func:`partition_order`,
+    and the extras to keep with it. ``steps`` names the cleaning steps it
+    applies; they are part of the cache key.
+    """
+    entry = Path(cache_dir) / cache_key(athlete_events_path, noc_regions_path, data_types, steps)
+    if not (entry / _COMPLETE).exists():
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        frame, extras = build()
+        write_cache(frame, entry, extras=extras)
+    return read_cache(entry), read_extras(entry)
@@ -0,0 +1,231 @@
+"""Single-pass cleaning pipeline for the merged athlete events frame.
+
+The notebook's cleaning cells used to add scratch columns (``Year2``,
+``Season2``, ``Name_length``, ``event_max``), copy the frame and drop them
+again, and every step copied the whole dataset. Here each cleaning step is a
+declared :class:`Step` that works on the frame in place, and
+:class:`CleaningPipeline` runs them back to back, timing each one and
+tracking the memory it allocates. Read-only checks (the Games rule, length
+audits, duplicate fingerprints) are :class:`ScanStep` objects instead:
+consecutive ones share a single pass over the frame, fed chunk by chunk.
+"""
+from __future__ import annotations
+
+import time
+import tracemalloc
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+
+import pandas as pd
+
+from sportsstats.dedup import DedupIndex
+from sportsstats.names import normalize_names, shared_names
+from sportsstats.validate import GAMES_RULE, DerivedColumnRule, validate_derived
+
+
+@dataclass(frozen=True)
+class Step:
+    """A named cleaning step; ``func`` mutates the frame and returns a result."""
+
+    name: str
+    func: Callable[[pd.DataFrame], object]
+
+
+@dataclass(frozen=True)
+class ScanStep:
+    """A named read-only check, fed the frame chunk by chunk.
+
+    ``start`` makes an empty state, ``update`` folds one chunk into it and
+    ``finish`` turns it into the result.
+    """
+
+    name: str
+    start: Callable[[], object]
+    update: Callable[[object, pd.DataFrame], None]
+    finish: Callable[[object], object]
+
+
+@dataclass
+class StepReport:
+    name: str
+    seconds: float
+    peak_bytes: int | None
+    result: object
+
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+class _Tracker:
+    """Time and peak allocation of the calls made for one step."""
+
+    def __init__(self, trace_memory: bool):
+        self.trace_memory = trace_memory
+        self.seconds = 0.0
+        self.peak = 0 if trace_memory else None
+
+    def call(self, func, *args):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        result = func(*args)
+        self.seconds += time.perf_counter() - start
+        if self.trace_memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1] - baseline)
+        return result
+
+
+class CleaningPipeline:
+    """Run declared :class:`Step` and :class:`ScanStep` objects over one frame, in place.
+
+    Consecutive scan steps share one pass over ``chunk_rows`` row slices of
+    the frame (views, not copies). Step names must be unique: reports are
+    looked up by name.
+    """
+
+    def __init__(self, steps: Iterable[Step | ScanStep], chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.steps = list(steps)
+        names = [step.name for step in self.steps]
+        if len(set(names)) != len(names):
+            raise ValueError(f'step names are not unique: {names}')
+        if chunk_rows < 1:
+            raise ValueError(f'chunk_rows must be positive, got {chunk_rows}')
+        self.chunk_rows = chunk_rows
+
+    def _groups(self) -> list[list[Step | ScanStep]]:
+        # runs of consecutive scan steps, every other step on its own
+        groups = []
+        for step in self.steps:
+            if isinstance(step, ScanStep) and groups and isinstance(groups[-1][-1], ScanStep):
+                groups[-1].append(step)
+            else:
+                groups.append([step])
+        return groups
+
+    def _scan(self, frame: pd.DataFrame, steps: Sequence[ScanStep], trace_memory: bool) -> list[StepReport]:
+        trackers = [_Tracker(trace_memory) for _ in steps]
+        states = [tracker.call(step.start) for step, tracker in zip(steps, trackers)]
+        # an empty frame still gets one (empty) chunk
+        for begin in range(0, max(len(frame), 1), self.chunk_rows):
+            chunk = frame.iloc[begin:begin + self.chunk_rows]
+            for step, tracker, state in zip(steps, trackers, states):
+                tracker.call(step.update, state, chunk)
+        results = [tracker.call(step.finish, state) for step, tracker, state in zip(steps, trackers, states)]
+        return [StepReport(step.name, tracker.seconds, tracker.peak, result)
+                for step, tracker, result in zip(steps, trackers, results)]
+
+    def run(self, frame: pd.DataFrame, trace_memory: bool = True) -> dict[str, StepReport]:
+        """Apply every step to ``frame`` and report its time and peak allocation, by step name.
+
+        Peak allocation comes from ``tracemalloc`` and is ``None`` when
+        ``trace_memory`` is off; tracing makes the steps noticeably slower.
+        For a scan step it is the largest peak over its chunks.
+        """
+        started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        reports = {}
+        try:
+            for group in self._groups():
+                if isinstance(group[0], ScanStep):
+                    done = self._scan(frame, group, trace_memory)
+                else:
+                    tracker = _Tracker(trace_memory)
+                    result = tracker.call(group[0].func, frame)
+                    done = [StepReport(group[0].name, tracker.seconds, tracker.peak, result)]
+                reports.update((report.name, report) for report in done)
+        finally:
+            if started_tracing:
+                tracemalloc.stop()
+        return reports
+
+
+def summary(reports: Mapping[str, StepReport]) -> pd.DataFrame:
+    """One row per step with its timing and allocation, for display."""
+    reports = list(reports.values())
+    return pd.DataFrame(
+        {'seconds': [report.seconds for report in reports],
+         'peak_mb': [None if report.peak_bytes is None else report.peak_bytes / 2**20 for report in reports]},
+        index=pd.Index([report.name for report in reports], name='step'),
+    )
+
+
+def _append_indexes(parts: list[pd.Index]) -> pd.Index:
+    return parts[0].append(parts[1:])
+
+
+def games_redundancy(games: str = 'Games', year: str = 'Year', season: str = 'Season') -> ScanStep:
+    """Check that ``games`` is ``year`` and ``season`` joined by a space.
+
+    The result is the index of the rows where it is not.
+    """
+    rule = DerivedColumnRule(games, (year, season), GAMES_RULE.parse)
+
+    def check(mismatched: list, chunk: pd.DataFrame) -> None:
+        mismatched.append(validate_derived(chunk, rule).mismatched)
+
+    return ScanStep(f'{games} redundancy', list, check, _append_indexes)
+
+
+def trim_names(source: str = 'Name_max', target: str = 'Name', max_tokens: int = 2, key: str = 'ID') -> Step:
+    """Keep the first ``max_tokens`` words of ``source`` in ``target``, as a categorical.
+
+    ``target`` is a display name: the result lists the trimmed names that
+    more than one ``key`` carries (see :func:`sportsstats.names.shared_names`).
+    """
+    def trim(frame: pd.DataFrame) -> pd.DataFrame:
+        frame[target] = normalize_names(frame[source], max_tokens)
+        return shared_names(frame, target, key)
+
+    return Step(f'trim {source}', trim)
+
+
+def audit_lengths(limits: Mapping[str, int | None]) -> ScanStep:
+    """Report string lengths of the given columns without adding any column.
+
+    The result maps each column to its distinct lengths and to the index of
+    the rows longer than its limit (``None`` means no limit).
+    """
+    def start() -> dict:
+        return {column: {'lengths': [], 'over_limit': []} for column in limits}
+
+    def audit(parts: dict, chunk: pd.DataFrame) -> None:
+        for column, limit in limits.items():
+            lengths = chunk[column].str.len()
+            parts[column]['lengths'].append(lengths.dropna().drop_duplicates())
+            parts[column]['over_limit'].append(chunk.index[lengths > limit] if limit is not None else chunk.index[:0])
+
+    def finish(parts: dict) -> dict:
+        return {
+            column: {
+                'lengths': pd.concat(part['lengths'], ignore_index=True).unique(),
+                'over_limit': _append_indexes(part['over_limit']),
+            }
+            for column, part in parts.items()
+        }
+
+    return ScanStep('audit ' + ', '.join(limits), start, audit, finish)
+
+
+def find_duplicates(
+    name: str = 'duplicates',
+    keys: Sequence[str] | None = None,
+    sport_keys: Mapping[str, Sequence[str] | None] | None = None,
+) -> ScanStep:
+    """Count duplicate rows with a :class:`~sportsstats.dedup.DedupIndex`, the result."""
+    return ScanStep(name, lambda: DedupIndex(keys, sport_keys), DedupIndex.update, lambda index: index)
+
+
+def drop_columns(columns: Iterable[str]) -> Step:
+    """Delete ``columns`` from the frame in place."""
+    columns = list(columns)
+
+    def drop(frame: pd.DataFrame) -> list[str]:
+        dropped = [column for column in columns if column in frame]
+        for column in dropped:
+            del frame[column]
+        return dropped
+
+    return Step('drop ' + ', '.join(columns), drop)
+
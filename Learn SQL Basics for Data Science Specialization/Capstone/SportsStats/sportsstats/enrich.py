@@ -0,0 +1,52 @@
+"""Broadcast lookup enrichment, used for the NOC -> region join.
+
+``pd.merge(athlete_events, noc_regions, on='NOC', how='left')`` copies the
+whole wide frame just to attach two columns from a ~230 row table. Here the
+key column is factorized once, every lookup row gets an integer code and the
+lookup columns are gathered through those codes into new columns of the
+existing frame as categoricals. Nothing else in the frame is copied.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+
+def lookup_codes(keys: pd.Series, lookup_keys: pd.Index) -> np.ndarray:
+    """Position of every value of ``keys`` in ``lookup_keys``, -1 when absent."""
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        # resolve the few categories, then broadcast through the codes
+        per_category = np.append(lookup_keys.get_indexer(keys.cat.categories), -1)
+        return per_category.take(keys.cat.codes.to_numpy())
+    return lookup_keys.get_indexer(keys)
+
+
+def enrich(
+    frame: pd.DataFrame,
+    lookup: pd.DataFrame,
+    on: str,
+    columns: Mapping[str, str],
+) -> pd.Series:
+    """Left-join ``columns`` of ``lookup`` onto ``frame`` in place.
+
+    ``columns`` maps lookup column names to the names they get in ``frame``;
+    the new columns are inserted right after ``on``. ``lookup`` must have
+    unique keys, like the broadcast side of a hash join. Returns the count of
+    ``frame`` rows per key that found no match in ``lookup`` (e.g. SGP, ROT).
+    """
+    lookup_keys = pd.Index(lookup[on])
+    if not lookup_keys.is_unique:
+        duplicated = lookup_keys[lookup_keys.duplicated()].unique().tolist()
+        raise ValueError(f'lookup has duplicate {on} keys: {duplicated}')
+    codes = lookup_codes(frame[on], lookup_keys)
+    position = frame.columns.get_loc(on) + 1
+    for source, target in columns.items():
+        # dictionary-encode the lookup column, rows then only carry small codes
+        value_codes, values = pd.factorize(lookup[source])
+        row_codes = np.append(value_codes, -1).take(codes)
+        frame.insert(position, target, pd.Categorical.from_codes(row_codes, values))
+        position += 1
+    unmatched = frame[on][codes == -1].value_counts(dropna=False)
+    return unmatched[unmatched > 0]
@@ -0,0 +1,78 @@
+"""Star schema for the ERD: deduplicated dimensions with surrogate keys.
+
+The ERD cells used to copy ``df1`` column subsets into "dimension" tables
+that were as long as the fact table, with every athlete and team repeated
+once per event entry. :func:`normalize` keeps one row per distinct member of
+each dimension with an integer surrogate key, and the fact table only holds
+those keys plus the measures.
+
+The athlete dimension has one row per athlete (ID, Name, Sex), so
+``Athlete_Key`` groups by athlete. Age, Height and Weight change between
+Games, they are measures of the fact table next to the medal.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# dimension table -> (surrogate key, natural columns)
+DIMENSIONS = {
+    'athletes': ('Athlete_Key', ('ID', 'Name', 'Sex')),
+    'teams': ('Team_Key', ('Team', 'NOC', 'Region', 'Note')),
+    'games': ('Games_Key', ('Year', 'Season', 'City')),
+    'events': ('Event_Key', ('Sport', 'Event')),
+}
+
+# fact table columns copied as they are, text ones as categoricals
+MEASURES = ('Age', 'Height', 'Weight', 'Medal')
+
+
+@dataclass
+class StarSchema:
+    dimensions: dict[str, pd.DataFrame]
+    results: pd.DataFrame
+
+    def tables(self) -> dict[str, pd.DataFrame]:
+        return {**self.dimensions, 'results': self.results}
+
+    def write(self, directory, compression: str = 'zstd') -> dict[str, Path]:
+        """Write every table as ``<directory>/<name>.parquet``."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for name, table in self.tables().items():
+            paths[name] = directory / f'{name}.parquet'
+            table.to_parquet(paths[name], index=False, compression=compression)
+        return paths
+
+
+def surrogate_keys(frame: pd.DataFrame, columns: Sequence[str], key: str) -> tuple[pd.DataFrame, np.ndarray]:
+    """The distinct rows of ``frame[columns]`` numbered from 1, and each row's number."""
+    grouped = frame.groupby(list(columns), observed=True, dropna=False, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    # first row of every group, taken without sorting the frame
+    first = np.full(grouped.ngroups, len(codes), dtype=np.int64)
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    dimension = frame[list(columns)].iloc[first].reset_index(drop=True)
+    dimension.insert(0, key, np.arange(1, len(dimension) + 1, dtype=np.int32))
+    return dimension, (codes + 1).astype(np.int32)
+
+
+def normalize(
+    frame: pd.DataFrame,
+    dimensions: Mapping[str, tuple[str, Sequence[str]]] = DIMENSIONS,
+    measures: Sequence[str] = MEASURES,
+) -> StarSchema:
+    """Split ``frame`` into deduplicated dimensions and an integer-keyed fact table."""
+    tables = {}
+    results = {}
+    for name, (key, columns) in dimensions.items():
+        tables[name], results[key] = surrogate_keys(frame, [column for column in columns if column in frame], key)
+    for measure in measures:
+        values = frame[measure]
+        results[measure] = values.array if pd.api.types.is_numeric_dtype(values) else values.astype('category').array
+    return StarSchema(tables, pd.DataFrame(results))
@@ -0,0 +1,126 @@
+"""Chunked, typed loading of athlete_events.csv.
+
+The notebook used to read the whole file with a single ``pd.read_csv`` call,
+keeping every text column as ``object``. Here the file is read in row chunks
+and the low-cardinality text columns are turned into categoricals that share
+one dictionary across chunks, so each chunk only stores small integer codes.
+
+Memory ceiling of :func:`load_athlete_events`: the typed result, plus one
+chunk while it is being parsed, plus the largest single column while the
+chunks are stitched together. The object-typed frame is never materialized.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator, Mapping
+
+import numpy as np
+import pandas as pd
+
+from sportsstats.nulls import NullIndex
+
+# low-cardinality text columns stored as categoricals
+CATEGORICAL_COLUMNS = ('Sex', 'Season', 'NOC', 'Sport', 'City', 'Medal', 'Team')
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+class CategoryDictionary:
+    """Append-only category dictionary shared by every chunk of a load.
+
+    New values are appended at the end, so codes handed out for earlier
+    chunks stay valid once later chunks have extended the dictionary.
+    """
+
+    def __init__(self, columns: Iterable[str] = CATEGORICAL_COLUMNS):
+        self._categories = {column: pd.Index([], dtype=object) for column in columns}
+
+    def __contains__(self, column: str) -> bool:
+        return column in self._categories
+
+    def categories(self, column: str) -> pd.Index:
+        return self._categories[column]
+
+    def encode(self, values: pd.Series) -> pd.Series:
+        """Return ``values`` as a categorical against the shared dictionary."""
+        local = values.astype('category') if values.dtype != 'category' else values
+        known = self._categories[values.name]
+        new = local.cat.categories.difference(known, sort=False)
+        if len(new):
+            known = known.append(new)
+            self._categories[values.name] = known
+        # remap the chunk-local codes onto the shared dictionary
+        mapping = known.get_indexer(local.cat.categories)
+        local_codes = local.cat.codes.to_numpy()
+        codes = mapping.take(local_codes)
+        codes[local_codes == -1] = -1
+        return pd.Series(pd.Categorical.from_codes(codes, known), index=values.index, name=values.name)
+
+
+def iter_athlete_events(
+    path,
+    dtype: Mapping[str, object],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dictionary: CategoryDictionary | None = None,
+    nulls: NullIndex | None = None,
+    **read_csv_kwargs,
+) -> Iterator[pd.DataFrame]:
+    """Yield typed chunks of ``path`` with categoricals from ``dictionary``.
+
+    ``dtype`` is the notebook's ``data_types`` map; the columns held by
+    ``dictionary`` are parsed straight into categoricals instead of ``str``.
+    Every yielded chunk is only valid against the dictionary as it stood when
+    the chunk was produced; call :func:`consolidate` to align them.
+
+    Null sentinels (``'NA'``, ``'None'``, ...) are read as missing values by
+    pandas' default NA strings, which cover all of
+    :data:`~sportsstats.nulls.NULL_SENTINELS`. When ``nulls`` is given every
+    chunk is added to it as it is parsed.
+    """
+    if dictionary is None:
+        dictionary = CategoryDictionary()
+    chunk_types = {column: ('category' if column in dictionary else kind) for column, kind in dtype.items()}
+    read_csv_kwargs.setdefault('quotechar', '"')
+    read_csv_kwargs.setdefault('delimiter', ',')
+    with pd.read_csv(path, dtype=chunk_types, chunksize=chunksize, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            for column in chunk.columns:
+                if column in dictionary:
+                    chunk[column] = dictionary.encode(chunk[column])
+            if nulls is not None:
+                nulls.append(chunk)
+            yield chunk
+
+
+def consolidate(chunks: list[pd.DataFrame], dictionary: CategoryDictionary) -> pd.DataFrame:
+    """Stitch ``chunks`` into one frame, column by column.
+
+    Columns are popped from the chunks as they are concatenated, so at most
+    one column is held twice at any time.
+    """
+    if not chunks:
+        return pd.DataFrame()
+    columns = {}
+    for name in list(chunks[0].columns):
+        parts = [chunk.pop(name) for chunk in chunks]
+        if name in dictionary:
+            codes = np.concatenate([part.cat.codes.to_numpy() for part in parts])
+            columns[name] = pd.Series(pd.Categorical.from_codes(codes, dictionary.categories(name)), name=name)
+        else:
+            columns[name] = pd.concat(parts, ignore_index=True)
+        del parts
+    return pd.DataFrame(columns, copy=False)
+
+
+def load_athlete_events(
+    path,
+    dtype: Mapping[str, object],
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    dictionary: CategoryDictionary | None = None,
+    nulls: NullIndex | None = None,
+    **read_csv_kwargs,
+) -> pd.DataFrame:
+    """Load ``path`` chunk by chunk into a single typed frame."""
+    if dictionary is None:
+        dictionary = CategoryDictionary()
+    chunks = list(iter_athlete_events(path, dtype, chunksize, dictionary, nulls, **read_csv_kwargs))
+    return consolidate(chunks, dictionary)
@@ -0,0 +1,75 @@
+"""Pre-aggregated medal counts serving every medal leaderboard.
+
+Each leaderboard cell in the notebook ran its own
+``df.pivot_table(values='ID', ..., columns='Medal', aggfunc='count')`` over
+the full frame. :class:`MedalCube` scans the frame once: it keeps only the
+medal rows and counts medals per combination of all the dimensions (Region,
+NOC, ID, Name, Year, Season, Sport, Event). Any coarser grouping is then a
+sum over that small base table, and is memoized.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import pandas as pd
+
+from sportsstats.leaderboard import top_k
+
+DIMENSIONS = ('Region', 'NOC', 'ID', 'Name', 'Year', 'Season', 'Sport', 'Event')
+
+# same column order as the notebook's pivot tables
+MEDALS = ('Bronze', 'Gold', 'Silver')
+
+
+class MedalCube:
+    """Medal counts by every dimension, with cheap rollups."""
+
+    def __init__(self, base: pd.DataFrame, dimensions: Sequence[str]):
+        self.base = base
+        self.dimensions = tuple(dimensions)
+        self._rollups: dict[tuple[str, ...], pd.DataFrame] = {}
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, dimensions: Sequence[str] = DIMENSIONS, medal: str = 'Medal') -> MedalCube:
+        """Build the base table with one groupby over the medal rows of ``frame``."""
+        dimensions = [column for column in dimensions if column in frame]
+        medals = frame.loc[frame[medal].notna(), dimensions + [medal]]
+        counts = (
+            medals.groupby(dimensions + [medal], observed=True, dropna=False, sort=False)
+            .size()
+            .unstack(medal, fill_value=0)
+            .reindex(columns=list(MEDALS), fill_value=0)
+            .astype('int32')
+        )
+        counts.columns = list(MEDALS)
+        base = counts.reset_index()
+        for column in dimensions:
+            # dimensions repeat a lot, store them as categoricals
+            if base[column].dtype == object or pd.api.types.is_string_dtype(base[column]):
+                base[column] = base[column].astype('category')
+        return cls(base, dimensions)
+
+    def rollup(self, by: str | Sequence[str]) -> pd.DataFrame:
+        """Medal counts per ``by``, one column per medal.
+
+        Rows with a missing ``by`` value are left out, like ``pivot_table``.
+        Groups are not sorted, they come in order of first appearance in the
+        base table; :meth:`top` orders the few rows it returns.
+        """
+        key = (by,) if isinstance(by, str) else tuple(by)
+        if key not in self._rollups:
+            missing = set(key).difference(self.dimensions)
+            if missing:
+                raise KeyError(f'not a cube dimension: {sorted(missing)}')
+            self._rollups[key] = self.base.groupby(list(key), observed=True, sort=False)[list(MEDALS)].sum()
+        return self._rollups[key]
+
+    def top(self, by: str | Sequence[str], n: int = 10, medal: str | None = None, order: str = 'total') -> pd.DataFrame:
+        """The ``n`` groups with the most medals, or the most ``medal`` medals.
+
+        ``order`` is passed to :func:`sportsstats.leaderboard.top_k`.
+        """
+        counts = self.rollup(by)
+        if medal is not None:
+            return top_k(counts.loc[counts[medal] > 0, [medal]], n, order=medal)
+        return top_k(counts, n, order=order)
@@ -0,0 +1,173 @@
+"""Incremental Bronze -> Silver -> Gold refresh on a local Parquet directory.
+
+The notebook rebuilds every layer with ``CREATE OR REPLACE TABLE ... AS
+SELECT *``, so one new Games edition rewrites the whole history three times.
+:class:`MedallionRunner` keeps the layers as Year/Season partitioned Parquet
+directories and a watermark per layer and partition: the fingerprint of the
+source rows the partition was last built from. A refresh only pushes the
+partitions whose fingerprint changed through the layers, and writes each of
+them with upsert semantics: rows are matched on ``merge_keys`` and replaced,
+other rows of the partition are kept (or, without merge keys, the partition
+is replaced as a whole, like Delta's ``replaceWhere``).
+
+Partitions that are no longer in the source are deleted from every layer
+with their watermarks, like MERGE's ``WHEN NOT MATCHED BY SOURCE THEN
+DELETE``; pass ``delete_missing=False`` to keep them (e.g. when the source
+is only the latest editions). A partition is only marked as done in a layer after it has been written
+there, so a refresh that dies half way resumes where it stopped.
+"""
+from __future__ import annotations
+
+import json
+import os
+import shutil
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+import pyarrow.dataset as ds
+
+PARTITION_COLUMNS = ('Year', 'Season')
+
+_WATERMARKS = '_watermarks.json'
+
+
+@dataclass(frozen=True)
+class Layer:
+    """One medallion layer: ``transform`` turns the previous layer's rows into its own."""
+
+    name: str
+    transform: Callable[[pd.DataFrame], pd.DataFrame] = lambda frame: frame
+    merge_keys: tuple[str, ...] = ()
+
+
+@dataclass
+class RefreshReport:
+    changed: list[tuple] = field(default_factory=list)
+    written: dict[str, list[tuple]] = field(default_factory=dict)
+    # partition values as in the directory names, i.e. as strings
+    deleted: list[tuple] = field(default_factory=list)
+
+
+def fingerprint(frame: pd.DataFrame) -> str:
+    """Order-insensitive content hash of ``frame``."""
+    hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return f'{len(hashes):x}-{int(hashes.sum()):016x}'
+
+
+def upsert(existing: pd.DataFrame | None, incoming: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    """MERGE ``incoming`` into ``existing``: matching keys are replaced, others kept."""
+    if existing is None or existing.empty or not keys:
+        return incoming.reset_index(drop=True)
+    existing_keys = pd.MultiIndex.from_frame(existing[list(keys)])
+    incoming_keys = pd.MultiIndex.from_frame(incoming[list(keys)])
+    kept = existing[~existing_keys.isin(incoming_keys)]
+    return pd.concat([kept, incoming], ignore_index=True)
+
+
+class MedallionRunner:
+    """Incrementally refresh ``layers`` under ``root``, one directory per layer."""
+
+    def __init__(self, root, table: str, layers: Sequence[Layer], partition_by: Sequence[str] = PARTITION_COLUMNS):
+        self.root = Path(root)
+        self.table = table
+        self.layers = list(layers)
+        self.partition_by = list(partition_by)
+
+    def _watermark_path(self) -> Path:
+        return self.root / f'{self.table}{_WATERMARKS}'
+
+    def watermarks(self) -> dict[str, dict[str, str]]:
+        path = self._watermark_path()
+        if not path.exists():
+            return {layer.name: {} for layer in self.layers}
+        stored = json.loads(path.read_text())
+        return {layer.name: stored.get(layer.name, {}) for layer in self.layers}
+
+    def _save_watermarks(self, watermarks: dict) -> None:
+        path = self._watermark_path()
+        staging = path.with_suffix('.tmp')
+        staging.write_text(json.dumps(watermarks, indent=1, sort_keys=True))
+        os.replace(staging, path)
+
+    def _delete_partition(self, layer: Layer, key: tuple) -> None:
+        directory = self._partition_dir(layer, key)
+        shutil.rmtree(directory, ignore_errors=True)
+        # drop the parent directories the partition leaves empty, e.g. Year=2012
+        top = self.root / f'{self.table}_{layer.name}'
+        for parent in directory.parents:
+            if parent == top or not parent.is_relative_to(top) or not parent.exists() or any(parent.iterdir()):
+                break
+            parent.rmdir()
+
+    def _partition_dir(self, layer: Layer, key: tuple) -> Path:
+        parts = [f'{column}={value}' for column, value in zip(self.partition_by, key)]
+        return self.root.joinpath(f'{self.table}_{layer.name}', *parts)
+
+    def _read_partition(self, layer: Layer, key: tuple) -> pd.DataFrame | None:
+        path = self._partition_dir(layer, key) / 'part-0.parquet'
+        if not path.exists():
+            return None
+        frame = pd.read_parquet(path)
+        for column, value in zip(self.partition_by, key):
+            frame[column] = value
+        return frame
+
+    def _write_partition(self, layer: Layer, key: tuple, frame: pd.DataFrame) -> None:
+        directory = self._partition_dir(layer, key)
+        directory.mkdir(parents=True, exist_ok=True)
+        staging = directory / '.part-0.parquet.tmp'
+        # partition values live in the directory names only
+        frame.drop(columns=self.partition_by).to_parquet(staging, index=False)
+        os.replace(staging, directory / 'part-0.parquet')
+
+    def refresh(self, source: pd.DataFrame, delete_missing: bool = True) -> RefreshReport:
+        """Push the partitions of ``source`` that changed through every layer.
+
+        With ``delete_missing``, partitions of the layers that ``source`` no
+        longer has are deleted.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        watermarks = self.watermarks()
+        report = RefreshReport(written={layer.name: [] for layer in self.layers})
+        if self.partition_by:
+            groups = source.groupby(self.partition_by, observed=True, sort=True, dropna=False)
+        else:
+            groups = [((), source)]
+        seen = set()
+        for key, rows in groups:
+            key = key if isinstance(key, tuple) else (key,)
+            token = '/'.join(map(str, key))
+            seen.add(token)
+            current = fingerprint(rows)
+            stale = {layer.name for layer in self.layers if watermarks[layer.name].get(token) != current}
+            if not stale:
+                continue
+            report.changed.append(key)
+            frame = rows
+            for layer in self.layers:
+                if layer.name in stale:
+                    frame = upsert(self._read_partition(layer, key), layer.transform(frame), layer.merge_keys)
+                    self._write_partition(layer, key, frame)
+                    watermarks[layer.name][token] = current
+                    self._save_watermarks(watermarks)
+                    report.written[layer.name].append(key)
+                else:
+                    # already up to date here, feed the stored partition downstream
+                    frame = self._read_partition(layer, key)
+        if delete_missing:
+            missing = sorted({token for layer in self.layers for token in watermarks[layer.name]} - seen)
+            for token in missing:
+                key = tuple(token.split('/')) if self.partition_by else ()
+                for layer in self.layers:
+                    self._delete_partition(layer, key)
+                    watermarks[layer.name].pop(token, None)
+                # directories first: a refresh that dies here still sees the watermark and deletes again
+                self._save_watermarks(watermarks)
+                report.deleted.append(key)
+        return report
+
+    def read(self, layer_name: str) -> pd.DataFrame:
+        """Read a whole layer back, partition columns included."""
+        return pd.read_parquet(self.root / f'{self.table}_{layer_name}', partitioning=ds.HivePartitioning.discover())
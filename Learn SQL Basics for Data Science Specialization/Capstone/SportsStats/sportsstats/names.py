@@ -0,0 +1,48 @@
+"""Athlete name normalization over Arrow strings.
+
+The notebook trimmed names with ``str.split().str[:2].str.join(' ')``, which
+builds a Python list for every row, and then used the trimmed name as the
+key of the athlete leaderboards, merging different people who share their
+first two words. :func:`normalize_names` runs the Arrow compute kernels
+(whitespace collapse and a regex extract) once per distinct name and returns
+a categorical, so grouping by name is grouping by integer codes. The trimmed
+name is only for display: athletes are identified by ``ID``, and
+:func:`shared_names` lists the display names that several IDs carry.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+def trim_tokens(values: pa.Array, max_tokens: int | None = 2) -> pa.Array:
+    """Collapse runs of whitespace and keep the first ``max_tokens`` words.
+
+    ``None`` keeps every word. Blank strings become null.
+    """
+    collapsed = pc.replace_substring_regex(pc.utf8_trim_whitespace(values), r'\s+', ' ')
+    words = r'\S+(?: \S+)*' if max_tokens is None else r'\S+(?: \S+){0,%d}' % (max_tokens - 1)
+    return pc.struct_field(pc.extract_regex(collapsed, '^(?P<name>%s)' % words), [0])
+
+
+def normalize_names(values: pd.Series, max_tokens: int | None = 2) -> pd.Series:
+    """Trimmed ``values`` as a categorical, computed once per distinct value."""
+    codes, uniques = pd.factorize(values)
+    names = pa.array(uniques.array, type=pa.large_string())
+    if isinstance(names, pa.ChunkedArray):
+        names = names.combine_chunks()
+    trimmed = pc.dictionary_encode(trim_tokens(names, max_tokens))
+    # distinct raw names can trim to the same name, remap them to one category
+    remap = trimmed.indices.fill_null(-1).to_numpy()
+    row_codes = np.where(codes < 0, -1, remap[codes]) if len(remap) else codes
+    categories = pd.Index(trimmed.dictionary.to_pylist(), dtype='str')
+    return pd.Series(pd.Categorical.from_codes(row_codes, categories), index=values.index, name=values.name)
+
+
+def shared_names(frame: pd.DataFrame, name: str = 'Name', key: str = 'ID') -> pd.DataFrame:
+    """Names carried by more than one ``key``, with how many, most shared first."""
+    counts = frame.groupby(name, observed=True)[key].nunique()
+    shared = counts[counts > 1].rename('ids')
+    return shared.sort_values(ascending=False, kind='stable').reset_index()
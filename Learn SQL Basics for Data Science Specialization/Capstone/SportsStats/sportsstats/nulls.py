@@ -0,0 +1,112 @@
+"""Null sentinel normalization and a reusable missing-value index.
+
+The notebook went back and forth between ``'NA'`` strings, ``np.nan`` and
+``None`` and re-ran ``df.isna().sum()`` (a full boolean frame) every time it
+needed a count. Sentinels are now turned into real missing values once,
+when the file is parsed (pandas' default NA strings already include every
+one of :data:`NULL_SENTINELS`), and :class:`NullIndex` keeps one validity
+bitmap per column, Arrow style, that answers counts, co-missingness patterns
+and row masks without scanning the frame again. The loader fills the index
+as it parses each chunk.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+import pandas as pd
+
+# strings that mean "missing" in the source files and in Spark extracts
+NULL_SENTINELS = ('NA', '', 'None', 'null', 'NULL', 'nan', 'NaN', '<NA>')
+
+
+def normalize_nulls(frame: pd.DataFrame, sentinels: Sequence[str] = NULL_SENTINELS) -> pd.DataFrame:
+    """Turn sentinel strings into missing values, in place, text columns only.
+
+    For frames that did not come through the loader, e.g. a Spark extract.
+    """
+    for column in frame.columns:
+        values = frame[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            found = values.cat.categories.intersection(list(sentinels))
+            if len(found):
+                frame[column] = values.cat.remove_categories(found)
+        elif values.dtype == object or pd.api.types.is_string_dtype(values):
+            hits = values.isin(sentinels)
+            if hits.any():
+                frame[column] = values.mask(hits)
+    return frame
+
+
+class NullIndex:
+    """Per-column validity bitmaps (1 bit per row), built chunk by chunk."""
+
+    def __init__(self):
+        self._chunks: dict[str, list[tuple[np.ndarray, int]]] = {}
+        self._missing: dict[str, int] = {}
+        self.rows = 0
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> NullIndex:
+        index = cls()
+        index.append(frame)
+        return index
+
+    def append(self, frame: pd.DataFrame) -> None:
+        """Add the rows of ``frame``, whose columns must match earlier chunks."""
+        if self.rows and list(frame.columns) != list(self._chunks):
+            raise ValueError('chunk columns differ from the indexed columns')
+        for column in frame.columns:
+            valid = frame[column].notna().to_numpy()
+            self._chunks.setdefault(column, []).append((np.packbits(valid), len(valid)))
+            self._missing[column] = self._missing.get(column, 0) + int(len(valid) - valid.sum())
+        self.rows += len(frame)
+
+    def add_columns(self, frame: pd.DataFrame) -> None:
+        """Index the columns of ``frame``, new columns over the rows already indexed."""
+        if len(frame) != self.rows:
+            raise ValueError(f'frame has {len(frame)} rows, the index has {self.rows}')
+        for column in frame.columns:
+            valid = frame[column].notna().to_numpy()
+            self._chunks[column] = [(np.packbits(valid), len(valid))]
+            self._missing[column] = int(len(valid) - valid.sum())
+
+    def take(self, positions: np.ndarray) -> NullIndex:
+        """A new index whose row ``i`` is row ``positions[i]`` of this one."""
+        index = NullIndex()
+        for column in self._chunks:
+            valid = self.valid(column)[positions]
+            index._chunks[column] = [(np.packbits(valid), len(valid))]
+            index._missing[column] = int(len(valid) - valid.sum())
+        index.rows = len(positions)
+        return index
+
+    def missing_counts(self) -> pd.Series:
+        """Missing values per column, like ``df.isna().sum()``."""
+        return pd.Series(self._missing, dtype='int64')
+
+    def total_missing(self) -> int:
+        return sum(self._missing.values())
+
+    def valid(self, column: str) -> np.ndarray:
+        """Boolean mask of the rows where ``column`` is present."""
+        return np.concatenate([np.unpackbits(bits, count=count).astype(bool) for bits, count in self._chunks[column]])
+
+    def missing(self, columns: str | Sequence[str], how: str = 'any') -> np.ndarray:
+        """Rows missing ``any`` (or ``all``) of ``columns``."""
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        masks = [~self.valid(column) for column in columns]
+        return np.logical_or.reduce(masks) if how == 'any' else np.logical_and.reduce(masks)
+
+    def patterns(self, columns: Sequence[str] = ('Age', 'Height', 'Weight')) -> pd.Series:
+        """Row count of every combination of missing ``columns``.
+
+        The index has one level per column, ``True`` where the value is missing.
+        """
+        codes = np.zeros(self.rows, dtype=np.int64)
+        for bit, column in enumerate(columns):
+            codes |= (~self.valid(column)).astype(np.int64) << bit
+        counts = np.bincount(codes, minlength=1 << len(columns))
+        combos = [tuple(bool(code >> bit & 1) for bit in range(len(columns))) for code in range(len(counts))]
+        patterns = pd.Series(counts, index=pd.MultiIndex.from_tuples(combos, names=list(columns)), name='rows')
+        return patterns[patterns > 0].sort_values(ascending=False)
@@ -0,0 +1,126 @@
+"""Tiered profiling around ``ydata_profiling.ProfileReport``.
+
+``ProfileReport(df)`` on the full joined frame computes correlations,
+interactions and duplicate scans over every row, and is the slowest cell of
+the notebook. :func:`profile` offers three tiers:
+
+- ``'minimal'``: ``ProfileReport(..., minimal=True)`` on every row,
+- ``'sampled'``: the full report on a sample stratified by Sport/Season,
+- ``'full'``: the original ``ProfileReport(df)``.
+
+:class:`ColumnStatsCache` is the cheap path meant for every pipeline run: it
+computes per-column statistics and caches them by a hash of the column's
+content, so after a one-column change only that column is recomputed.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from collections.abc import Sequence
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+TIERS = ('minimal', 'sampled', 'full')
+
+STRATA = ('Sport', 'Season')
+
+
+def stratified_sample(
+    frame: pd.DataFrame,
+    strata: Sequence[str] = STRATA,
+    fraction: float = 0.1,
+    min_rows: int = 5,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Sample ``fraction`` of every stratum, and at least ``min_rows`` of it.
+
+    Small strata (rare sports) are kept whole rather than dropped.
+    """
+    rng = np.random.default_rng(seed)
+    picked = []
+    for positions in frame.groupby(list(strata), observed=True, dropna=False).indices.values():
+        size = min(len(positions), max(min_rows, int(np.ceil(fraction * len(positions)))))
+        picked.append(rng.choice(positions, size=size, replace=False))
+    if not picked:
+        return frame.iloc[:0]
+    return frame.iloc[np.sort(np.concatenate(picked))]
+
+
+def profile(frame: pd.DataFrame, tier: str = 'minimal', **kwargs):
+    """Build a ``ProfileReport`` of ``frame`` at the given tier.
+
+    ``kwargs`` go to :func:`stratified_sample` for the ``'sampled'`` tier and
+    to ``ProfileReport`` otherwise.
+    """
+    from ydata_profiling import ProfileReport
+
+    if tier == 'minimal':
+        return ProfileReport(frame, minimal=True, **kwargs)
+    if tier == 'sampled':
+        return ProfileReport(stratified_sample(frame, **kwargs))
+    if tier == 'full':
+        return ProfileReport(frame, **kwargs)
+    raise ValueError(f'tier must be one of {TIERS}, got {tier!r}')
+
+
+def column_hash(values: pd.Series) -> str:
+    """Hash of a column's name, dtype and values."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{values.name}\0{values.dtype}\0'.encode())
+    digest.update(pd.util.hash_pandas_object(values, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def column_stats(values: pd.Series, top: int = 5) -> dict:
+    """Summary statistics of one column, JSON friendly."""
+    count = int(values.notna().sum())
+    stats = {
+        'dtype': str(values.dtype),
+        'count': count,
+        'missing': int(len(values) - count),
+        'distinct': int(values.nunique(dropna=True)),
+    }
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        numbers = values.dropna().astype('float64')
+        if len(numbers):
+            stats.update(
+                mean=float(numbers.mean()),
+                std=float(numbers.std()) if len(numbers) > 1 else None,
+                min=float(numbers.min()),
+                median=float(numbers.median()),
+                max=float(numbers.max()),
+            )
+    else:
+        frequent = values.value_counts(dropna=True).head(top)
+        stats['top'] = {str(value): int(count) for value, count in frequent.items()}
+    return stats
+
+
+class ColumnStatsCache:
+    """Per-column statistics, recomputed only for columns whose content changed.
+
+    With a ``path`` the cache is kept as a JSON file across runs.
+    """
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path is not None else None
+        self._entries: dict[str, dict] = {}
+        if self.path is not None and self.path.exists():
+            self._entries = json.loads(self.path.read_text())
+        self.computed: list[str] = []
+
+    def stats(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """One row of statistics per column of ``frame``."""
+        self.computed = []
+        rows = {}
+        for name in frame.columns:
+            key = column_hash(frame[name])
+            if key not in self._entries:
+                self._entries[key] = column_stats(frame[name])
+                self.computed.append(name)
+            rows[name] = self._entries[key]
+        if self.path is not None and self.computed:
+            self.path.write_text(json.dumps(self._entries))
+        return pd.DataFrame.from_dict(rows, orient='index')
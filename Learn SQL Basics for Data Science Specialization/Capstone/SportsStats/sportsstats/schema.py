@@ -0,0 +1,112 @@
+"""Declarative Silver schemas, compiled to one projection at ingest.
+
+``athlete_events_Silver`` used to cast all 15 Bronze columns, ``Games``
+included. The table protocol then had to be upgraded to column mapping just
+to ``DROP COLUMNS (Games)``. A :class:`SchemaSpec` lists the columns the
+Silver table keeps, with their types, renames and derived expressions, and
+compiles to a single ``SELECT`` (or a pandas projection). Dropped columns
+are never read or written.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import pandas as pd
+
+# SQL type of a Silver column -> pandas dtype used outside Spark
+PANDAS_TYPES = {
+    'int': 'Int64',
+    'float': 'float32',
+    'double': 'float64',
+    'string': str,
+}
+
+
+@dataclass(frozen=True)
+class Column:
+    """One Silver column.
+
+    ``source`` is the input column it is read from (defaults to ``name``).
+    Derived columns set ``expr`` (SQL) and ``compute`` (the same thing over a
+    pandas frame) instead.
+    """
+
+    name: str
+    type: str
+    source: str | None = None
+    expr: str | None = None
+    compute: Callable[[pd.DataFrame], pd.Series] | None = None
+
+    @property
+    def input(self) -> str | None:
+        return None if self.expr is not None else (self.source or self.name)
+
+
+@dataclass(frozen=True)
+class SchemaSpec:
+    columns: tuple[Column, ...]
+    drop: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        kept = {column.input for column in self.columns}
+        clash = kept.intersection(self.drop)
+        if clash:
+            raise ValueError(f'columns both kept and dropped: {sorted(clash)}')
+
+    @property
+    def inputs(self) -> list[str]:
+        """Input columns the projection reads, in order and without repeats."""
+        return list(dict.fromkeys(column.input for column in self.columns if column.input is not None))
+
+    def select_sql(self, table: str) -> str:
+        """The projection as one ``SELECT`` over ``table``."""
+        lines = []
+        for column in self.columns:
+            value = column.expr if column.expr is not None else column.input
+            lines.append(f'CAST({value} AS {column.type}) AS {column.name}')
+        return 'SELECT\n  ' + ',\n  '.join(lines) + f'\nFROM {table}'
+
+    def apply(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Project ``frame`` (a Bronze frame) onto the spec.
+
+        Text columns keep their dtype, so categoricals stay categoricals.
+        """
+        columns = {}
+        for column in self.columns:
+            values = column.compute(frame) if column.expr is not None else frame[column.input]
+            target = PANDAS_TYPES[column.type]
+            if target is not str and values.dtype != target:
+                values = values.astype(target)
+            columns[column.name] = values
+        return pd.DataFrame(columns, index=frame.index, copy=False)
+
+
+ATHLETE_EVENTS_SILVER = SchemaSpec(
+    columns=(
+        Column('ID', 'int'),
+        Column('Name', 'string'),
+        Column('Sex', 'string'),
+        Column('Age', 'int'),
+        Column('Height', 'int'),
+        Column('Weight', 'float'),
+        Column('Team', 'string'),
+        Column('NOC', 'string'),
+        Column('Year', 'int'),
+        Column('Season', 'string'),
+        Column('City', 'string'),
+        Column('Sport', 'string'),
+        Column('Event', 'string'),
+        Column('Medal', 'string'),
+    ),
+    # Games is Year + ' ' + Season, see sportsstats.validate.GAMES_RULE
+    drop=('Games',),
+)
+
+NOC_REGIONS_SILVER = SchemaSpec(
+    columns=(
+        Column('NOC', 'string'),
+        Column('Region', 'string', source='region'),
+        Column('Note', 'string', source='notes'),
+    ),
+)
@@ -0,0 +1,27 @@
+import pytest
+
+from sportsstats.backend import DuckDBBackend, SQLAlchemyBackend
+from sportsstats.nulls import NULL_SENTINELS
+
+CSV = 'k,v\n1,NA\n2,\n3,nan\n4,"NA"\n5,""\n6,x\n7,None\n8,n/a\n'
+
+
+@pytest.fixture(params=['duckdb', 'sqlite'])
+def backend(request):
+    if request.param == 'duckdb':
+        pytest.importorskip('duckdb')
+        return DuckDBBackend()
+    pytest.importorskip('sqlalchemy')
+    return SQLAlchemyBackend()
+
+
+@pytest.mark.parametrize('sentinels, expected', [
+    (NULL_SENTINELS, [None, None, None, None, None, 'x', None, 'n/a']),
+    (('NA',), [None, '', 'nan', None, '', 'x', 'None', 'n/a']),
+])
+def test_load_csv_nulls_exactly_the_sentinels(backend, tmp_path, sentinels, expected):
+    path = tmp_path / 'values.csv'
+    path.write_text(CSV)
+    backend.load_csv('t', path, sentinels)
+    values = backend.execute('SELECT v FROM t ORDER BY CAST(k AS INTEGER)')['v']
+    assert values.astype(object).where(values.notna(), None).tolist() == expected
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from sportsstats.backend import DuckDBBackend, SQLAlchemyBackend
+from sportsstats.transfer import to_frame
+
+# a: NULL only in the second batch of two rows, b: NULL for the whole first batch
+ROWS = [(1, None), (2, None), (3, 'x'), (None, 'y'), (5, None)]
+
+
+@pytest.fixture(params=['duckdb', 'sqlite'])
+def backend(request):
+    if request.param == 'duckdb':
+        pytest.importorskip('duckdb')
+        backend = DuckDBBackend()
+    else:
+        pytest.importorskip('sqlalchemy')
+        backend = SQLAlchemyBackend()
+    backend.execute('CREATE TABLE t (a INTEGER, b TEXT)')
+    values = ', '.join(f"({'NULL' if a is None else a}, {'NULL' if b is None else repr(b)})" for a, b in ROWS)
+    backend.execute(f'INSERT INTO t VALUES {values}')
+    return backend
+
+
+@pytest.mark.parametrize('batch_rows', [1, 2, 3, 10])
+def test_nulls_split_across_batches(backend, batch_rows):
+    frame = to_frame(backend.record_batches('SELECT a, b FROM t ORDER BY rowid', batch_rows))
+    assert pd.api.types.is_integer_dtype(frame['a'])
+    assert frame['a'].tolist() == [1, 2, 3, pd.NA, 5]
+    assert frame['b'].astype(object).where(frame['b'].notna(), None).tolist() == [b for _, b in ROWS]
+
+
+def test_column_types_do_not_depend_on_the_batch_size(backend):
+    whole = to_frame(backend.record_batches('SELECT a, b FROM t ORDER BY rowid', 10))
+    split = to_frame(backend.record_batches('SELECT a, b FROM t ORDER BY rowid', 2))
+    pd.testing.assert_frame_equal(whole, split)
+
+
+def test_empty_result_keeps_the_columns(backend):
+    frame = to_frame(backend.record_batches('SELECT a, b FROM t WHERE a > 100'))
+    assert list(frame.columns) == ['a', 'b']
+    assert len(frame) == 0
+    if isinstance(backend, DuckDBBackend):
+        assert pd.api.types.is_integer_dtype(frame['a'])
+
+
+def test_only_the_dictionary_columns_become_categoricals(backend):
+    sql = 'SELECT a, b, b AS c FROM t ORDER BY rowid'
+    frame = to_frame(backend.record_batches(sql, 2), dictionary=['c'])
+    assert isinstance(frame['c'].dtype, pd.CategoricalDtype)
+    assert not isinstance(frame['b'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_series_equal(frame['c'].astype(frame['b'].dtype), frame['b'], check_names=False)
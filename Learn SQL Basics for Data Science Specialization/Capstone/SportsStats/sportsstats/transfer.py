@@ -0,0 +1,113 @@
+"""Arrow record batch handoff of the Gold join to pandas.
+
+The notebook pulled the Gold join with ``sql(...).toPandas()``, which
+collects every row of every column on the driver, and then ran
+``replace('NA', None)`` over the whole frame. :func:`extract` builds a query
+that turns the ``'NA'`` sentinels into NULL in the engine, keeps only the
+requested columns and applies the filter there (``Medal IS NOT NULL`` for
+the medal tables). It then reads the result as Arrow record batches through
+:meth:`sportsstats.backend.Backend.record_batches`. The low-cardinality text
+columns are dictionary encoded batch by batch and arrive in pandas as
+categoricals.
+"""
+from __future__ import annotations
+
+from collections.abc import Collection, Iterable, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from sportsstats.backend import DEFAULT_BATCH_ROWS, Backend
+from sportsstats.schema import ATHLETE_EVENTS_SILVER, NOC_REGIONS_SILVER
+
+# output column -> source column of the Gold join, in the notebook's order
+GOLD_COLUMNS = {
+    **{column.name: f'ae.{column.name}' for column in ATHLETE_EVENTS_SILVER.columns[:8]},
+    'Region': 'nr.Region',
+    'Note': 'nr.Note',
+    **{column.name: f'ae.{column.name}' for column in ATHLETE_EVENTS_SILVER.columns[8:]},
+}
+
+TEXT_COLUMNS = frozenset(
+    column.name for spec in (ATHLETE_EVENTS_SILVER, NOC_REGIONS_SILVER) for column in spec.columns
+    if column.type == 'string'
+)
+
+# low-cardinality text columns, dictionary encoded on the way to pandas; Name is left out, it has
+# about one value per athlete and its dictionary would be as large as the column
+DICTIONARY_COLUMNS = ('Sex', 'Team', 'NOC', 'Region', 'Note', 'Season', 'City', 'Sport', 'Event', 'Medal')
+
+# the Silver tables keep 'NA' as text, the casts only null it in numeric columns
+GOLD_SENTINELS = ('NA',)
+
+# Integer columns with nulls stay integers instead of becoming float64
+_PANDAS_TYPES = {pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype()}
+
+
+def null_if(expression: str, sentinels: Iterable[str]) -> str:
+    """``expression`` with every sentinel string turned into NULL."""
+    for sentinel in sentinels:
+        quoted = sentinel.replace("'", "''")
+        expression = f"NULLIF({expression}, '{quoted}')"
+    return expression
+
+
+def gold_join_sql(sentinels: Sequence[str] = GOLD_SENTINELS) -> str:
+    """The notebook's Gold join, with the sentinels of text columns nulled."""
+    columns = ',\n  '.join(
+        f'{null_if(source, sentinels) if name in TEXT_COLUMNS else source} AS {name}'
+        for name, source in GOLD_COLUMNS.items()
+    )
+    # 'ae' rather than the notebook's 'at', which DuckDB reserves
+    return (f'SELECT\n  {columns}\nFROM athlete_events_Gold ae\n'
+            'LEFT JOIN noc_regions_Gold nr ON ae.NOC = nr.NOC')
+
+
+def extract_sql(source: str, columns: Sequence[str] | None = None, where: str | None = None) -> str:
+    """Project and filter the query ``source`` in the engine.
+
+    ``where`` refers to the output columns of ``source``, after the sentinels
+    were nulled, e.g. ``'Medal IS NOT NULL'``.
+    """
+    projection = '*' if columns is None else ', '.join(columns)
+    sql = f'SELECT {projection}\nFROM (\n{source}\n) AS source'
+    return sql if where is None else f'{sql}\nWHERE {where}'
+
+
+def to_frame(batches: Iterable[pa.RecordBatch], dictionary: Collection[str] = DICTIONARY_COLUMNS) -> pd.DataFrame:
+    """Assemble record batches into a pandas frame.
+
+    The text columns named in ``dictionary`` are encoded batch by batch, so
+    that each distinct string is held once and becomes a categorical. The
+    batches are held in Arrow until the last one arrives, then each column's
+    Arrow memory is released as pandas takes it over. An empty result (one
+    empty batch, see :meth:`~sportsstats.backend.Backend.record_batches`)
+    gives an empty frame with the result's columns and types.
+    """
+    tables = []
+    for batch in batches:
+        encoded = [
+            pc.dictionary_encode(values)
+            if name in dictionary and (pa.types.is_string(values.type) or pa.types.is_large_string(values.type))
+            else values
+            for name, values in zip(batch.schema.names, batch.columns)
+        ]
+        tables.append(pa.Table.from_batches([pa.RecordBatch.from_arrays(encoded, names=batch.schema.names)]))
+    if not tables:
+        return pd.DataFrame()
+    table = pa.concat_tables(tables, promote_options='default').unify_dictionaries()
+    del tables
+    return table.to_pandas(types_mapper=_PANDAS_TYPES.get, split_blocks=True, self_destruct=True)
+
+
+def extract(
+    backend: Backend,
+    columns: Sequence[str] | None = None,
+    where: str | None = None,
+    batch_rows: int = DEFAULT_BATCH_ROWS,
+    sentinels: Sequence[str] = GOLD_SENTINELS,
+) -> pd.DataFrame:
+    """Stream ``columns`` of the Gold join rows matching ``where`` into pandas."""
+    sql = extract_sql(gold_join_sql(sentinels), columns, where)
+    return to_frame(backend.record_batches(sql, batch_rows))
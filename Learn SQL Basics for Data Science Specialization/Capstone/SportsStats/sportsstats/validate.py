@@ -0,0 +1,85 @@
+"""Validation of derived columns such as ``Games = Year + ' ' + Season``.
+
+Checking the rule row by row means splitting or building a string for every
+row. A derived column only has a handful of distinct values (``Games`` has
+about 51), so the column is factorized instead, each distinct value is parsed
+back into its source values once, and the expected sources are broadcast to
+the rows through the factor codes and compared there.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class DerivedColumnRule:
+    """``column`` is derived from ``sources``.
+
+    ``parse`` turns one value of ``column`` back into the tuple of source
+    values it was derived from.
+    """
+
+    column: str
+    sources: tuple[str, ...]
+    parse: Callable[[object], tuple]
+
+
+@dataclass
+class ValidationReport:
+    rule: DerivedColumnRule
+    distinct: int
+    mismatched: pd.Index
+
+    @property
+    def ok(self) -> bool:
+        return len(self.mismatched) == 0
+
+
+def _parse_games(value: str) -> tuple:
+    year, season = value.split(' ', 1)
+    return int(year), season
+
+
+GAMES_RULE = DerivedColumnRule('Games', ('Year', 'Season'), _parse_games)
+
+
+def _differs(values: pd.Series, expected: list, codes: np.ndarray) -> np.ndarray:
+    """Rows of ``values`` not equal to ``expected`` gathered through ``codes``."""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # compare codes: map the few expected values onto the categories
+        expected_codes = values.cat.categories.get_indexer(pd.Index(expected, dtype=object))
+        # a value absent from the categories must not match a missing row
+        expected_codes[(expected_codes == -1) & pd.notna(np.array(expected, dtype=object))] = -2
+        return expected_codes.take(codes) != values.cat.codes.to_numpy()
+    gathered = pd.Series(pd.array(expected, dtype=values.dtype).take(codes), index=values.index)
+    differs = values != gathered
+    # a missing value on only one side is a mismatch as well
+    return (differs.fillna(True) & ~(values.isna() & gathered.isna())).to_numpy(dtype=bool)
+
+
+def validate_derived(frame: pd.DataFrame, rule: DerivedColumnRule) -> ValidationReport:
+    """Check ``rule`` once per distinct value and report the mismatching rows.
+
+    Rows where the derived column is missing, or has a value ``parse``
+    rejects, count as mismatches.
+    """
+    codes, uniques = pd.factorize(frame[rule.column])
+    parsed = []
+    bad = np.zeros(len(uniques), dtype=bool)
+    for position, value in enumerate(uniques):
+        try:
+            parsed.append(tuple(rule.parse(value)))
+        except (TypeError, ValueError):
+            parsed.append((None,) * len(rule.sources))
+            bad[position] = True
+    mismatch = (codes == -1) | np.append(bad, False).take(codes)
+    valid_codes = np.where(codes == -1, 0, codes)
+    for index, source in enumerate(rule.sources):
+        expected = [values[index] for values in parsed]
+        if expected:
+            mismatch |= _differs(frame[source], expected, valid_codes)
+    return ValidationReport(rule, len(uniques), frame.index[mismatch])
@@ -0,0 +1 @@
+"""Helpers for running the bike sharing EDA lab (Lab-SQL-EDA.ipynb) locally."""
@@ -0,0 +1,130 @@
+"""Incrementally maintained weather/rental cube of the bike data.
+
+The lab's seasonal and hourly dashboards (tasks 7 to 9) aggregate the raw
+hourly rows on every run. :class:`BikeCube` keeps, for every (SEASONS,
+HOUR, HOLIDAY, FUNCTIONING_DAY) group, mergeable partial states of each
+measure: count, sum, sum of squares, min and max. :meth:`BikeCube.append`
+folds new hourly rows into those states with one ``INSERT ... ON CONFLICT
+DO UPDATE``, so the cube never rescans old rows. :meth:`BikeCube.rollup`
+answers averages, extremes and standard deviations for any coarser
+grouping from the groups alone.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import duckdb
+import pandas as pd
+
+from bike_eda.loader import SEOUL_BIKE_SHARING_TYPES, insert_rows
+
+KEYS = ('SEASONS', 'HOUR', 'HOLIDAY', 'FUNCTIONING_DAY')
+
+MEASURES = ('RENTED_BIKE_COUNT', 'TEMPERATURE', 'HUMIDITY', 'WIND_SPEED', 'VISIBILITY',
+            'DEW_POINT_TEMPERATURE', 'SOLAR_RADIATION', 'RAINFALL', 'SNOWFALL')
+
+# partial state -> (aggregate over new rows, merge of the stored and the new state)
+STATES = {
+    'count': ('COUNT({m})', '{t}.{c} + EXCLUDED.{c}'),
+    'sum': ('SUM({m})', 'COALESCE({t}.{c}, 0) + COALESCE(EXCLUDED.{c}, 0)'),
+    'sumsq': ('SUM(CAST({m} AS DOUBLE) * {m})', 'COALESCE({t}.{c}, 0) + COALESCE(EXCLUDED.{c}, 0)'),
+    'min': ('MIN({m})', 'LEAST({t}.{c}, EXCLUDED.{c})'),
+    'max': ('MAX({m})', 'GREATEST({t}.{c}, EXCLUDED.{c})'),
+}
+
+# statistic -> expression over the merged states of a rollup group
+STATISTICS = {
+    'count': 'SUM({m}_count)',
+    'sum': 'SUM({m}_sum)',
+    'avg': 'SUM({m}_sum) / NULLIF(SUM({m}_count), 0)',
+    'min': 'MIN({m}_min)',
+    'max': 'MAX({m}_max)',
+    # population standard deviation, like Db2's STDDEV
+    'stddev': 'SQRT(GREATEST(SUM({m}_sumsq) / NULLIF(SUM({m}_count), 0) '
+              '- POWER(SUM({m}_sum) / NULLIF(SUM({m}_count), 0), 2), 0))',
+}
+
+
+class BikeCube:
+    """Partial aggregates of ``measures`` per ``keys``, kept in the DuckDB table ``table``."""
+
+    def __init__(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        table: str = 'BIKE_CUBE',
+        keys: Sequence[str] = KEYS,
+        measures: Sequence[str] = MEASURES,
+    ):
+        self.con = con
+        self.table = table
+        self.keys = tuple(keys)
+        self.measures = tuple(measures)
+
+    def create(self, source: str | None = 'SEOUL_BIKE_SHARING') -> None:
+        """(Re)create the cube, filled from the rows of ``source`` if given."""
+        key_columns = ', '.join(f'{key} {SEOUL_BIKE_SHARING_TYPES[key]}' for key in self.keys)
+        state_columns = ', '.join(
+            f'{measure}_{state} {"BIGINT" if state == "count" else "DOUBLE"}'
+            for measure in self.measures for state in STATES
+        )
+        self.con.execute(f'CREATE OR REPLACE TABLE {self.table} ({key_columns}, {state_columns}, '
+                         f'PRIMARY KEY ({", ".join(self.keys)}))')
+        if source is not None:
+            self.merge(source)
+
+    def merge(self, rows: str) -> None:
+        """Fold the rows of the table or view ``rows`` into the cube."""
+        keys = ', '.join(self.keys)
+        states = ', '.join(STATES[state][0].format(m=measure) for measure in self.measures for state in STATES)
+        updates = ', '.join(
+            f'{measure}_{state} = {merge.format(t=self.table, c=f"{measure}_{state}")}'
+            for measure in self.measures for state, (_, merge) in STATES.items()
+        )
+        self.con.execute(
+            f'INSERT INTO {self.table} SELECT {keys}, {states} FROM {rows} GROUP BY {keys} '
+            f'ON CONFLICT ({keys}) DO UPDATE SET {updates}'
+        )
+
+    def append(self, frame: pd.DataFrame, source: str | None = 'SEOUL_BIKE_SHARING') -> None:
+        """Add new hourly rows: stored in ``source`` (unless ``None``) and folded into the cube."""
+        self.con.register('_bike_cube_rows', frame)
+        try:
+            if source is not None:
+                insert_rows(self.con, '_bike_cube_rows', source)
+            self.merge('_bike_cube_rows')
+        finally:
+            self.con.unregister('_bike_cube_rows')
+
+    def rollup(
+        self,
+        by: str | Sequence[str],
+        measures: Sequence[str] | None = None,
+        statistics: Sequence[str] = ('avg',),
+    ) -> pd.DataFrame:
+        """``statistics`` of ``measures`` per ``by``, computed from the cube's groups only.
+
+        Columns are named ``<statistic>_<measure>`` (lower case).
+        """
+        by = [by] if isinstance(by, str) else list(by)
+        missing = set(by).difference(self.keys)
+        if missing:
+            raise KeyError(f'not a cube key: {sorted(missing)}')
+        measures = self.measures if measures is None else measures
+        expressions = ', '.join(
+            f'{STATISTICS[statistic].format(m=measure)} AS {statistic}_{measure.lower()}'
+            for measure in measures for statistic in statistics
+        )
+        group = f' GROUP BY {", ".join(by)} ORDER BY {", ".join(by)}' if by else ''
+        select = ', '.join([*by, expressions])
+        return self.con.execute(f'SELECT {select} FROM {self.table}{group}').df()
+
+    def hourly_popularity(self, n: int = 10) -> pd.DataFrame:
+        """Task 7 of the lab: the ``n`` (SEASONS, HOUR) groups with the highest average rentals."""
+        frame = self.rollup(('SEASONS', 'HOUR'), ('TEMPERATURE', 'RENTED_BIKE_COUNT'))
+        frame.columns = ['SEASONS', 'HOUR', 'avg_temp', 'avg_rent']
+        return frame.nlargest(n, 'avg_rent').reset_index(drop=True)
+
+    def weather_seasonality(self) -> pd.DataFrame:
+        """Task 9 of the lab: the average rentals and weather of each season."""
+        frame = self.rollup('SEASONS')
+        return frame.sort_values('avg_rented_bike_count', ascending=False).reset_index(drop=True)
@@ -0,0 +1,164 @@
+"""Many aggregates of one table, computed in a single scan.
+
+Most of the lab's tasks are separate full scans of ``SEOUL_BIKE_SHARING``:
+``COUNT(*)``, ``SUM(HOUR) WHERE ...``, ``DISTINCT SEASONS``, ``MIN/MAX(DATE)``,
+the peak hour (which scans twice through its ``MAX`` subquery) and the two
+``GROUP BY SEASONS`` statistics. :func:`execute` takes a batch of declared
+:class:`Aggregate` objects and compiles them into one DuckDB query. The
+table is scanned once, grouped by all the grouping columns of the batch,
+into mergeable partial states (sums, counts, sums of squares, lists), with
+filters as ``FILTER (WHERE ...)`` clauses. ``GROUPING SETS`` then merge
+those few partial rows into each aggregate's own grouping, and
+``GROUPING()`` sorts the result rows back to their aggregates. The
+peak-hour pattern is the ``argmax`` aggregate (``max_by`` with ``k`` rows),
+per group if needed.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import duckdb
+import pandas as pd
+
+# partial states of each aggregate function, and how to merge them ({0}, {1}, ... are the partials)
+FUNCTIONS = {
+    'count': (('COUNT({column})',), 'CAST(SUM({0}) AS BIGINT)'),
+    'sum': (('SUM({column})',), 'SUM({0})'),
+    'avg': (('SUM({column})', 'COUNT({column})'), 'SUM({0}) / SUM({1})'),
+    'min': (('MIN({column})',), 'MIN({0})'),
+    'max': (('MAX({column})',), 'MAX({0})'),
+    # population standard deviation, like Db2's STDDEV
+    'stddev': (('SUM({column})', 'SUM({column} * {column})', 'COUNT({column})'),
+               'SQRT(GREATEST(SUM({1}) / SUM({2}) - POWER(SUM({0}) / SUM({2}), 2), 0))'),
+    'distinct': (('LIST(DISTINCT {column})',), 'list_sort(list_distinct(flatten(LIST({0}))))'),
+}
+
+
+@dataclass(frozen=True)
+class Aggregate:
+    """One declared aggregate.
+
+    ``column`` is ``None`` for ``COUNT(*)``. ``where`` is an SQL predicate
+    applied to this aggregate only, and ``by`` its grouping columns. An
+    ``'argmax'`` aggregate returns the ``values`` columns (and ``column``) of
+    the ``k`` rows with the largest ``column``.
+    """
+
+    name: str
+    func: str
+    column: str | None = None
+    where: str | None = None
+    by: tuple[str, ...] = ()
+    values: tuple[str, ...] = ()
+    k: int = 1
+
+    def __post_init__(self):
+        if self.func != 'argmax' and self.func not in FUNCTIONS:
+            raise ValueError(f"func must be 'argmax' or one of {sorted(FUNCTIONS)}, got {self.func!r}")
+        if self.column is None and self.func != 'count':
+            raise ValueError(f'{self.func} needs a column')
+
+    def partials(self) -> list[str]:
+        if self.func == 'argmax':
+            # the ranked column first, so sorting the structs sorts by it
+            fields = ', '.join(f"'{column}': {column}" for column in (self.column, *self.values))
+            expressions = [f'max_by({{{fields}}}, {self.column}, {self.k})']
+        else:
+            expressions = [partial.format(column=self.column or '*') for partial in FUNCTIONS[self.func][0]]
+        if self.where is not None:
+            expressions = [f'{expression} FILTER (WHERE {self.where})' for expression in expressions]
+        return expressions
+
+    def merge(self, partials: Sequence[str]) -> str:
+        if self.func == 'argmax':
+            return f"list_slice(list_sort(flatten(LIST({partials[0]})), 'DESC'), 1, {self.k})"
+        return FUNCTIONS[self.func][1].format(*partials)
+
+
+def compile_batch(aggregates: Sequence[Aggregate], table: str) -> tuple[str, list[str]]:
+    """The single query of ``aggregates`` and its grouping columns."""
+    names = [aggregate.name for aggregate in aggregates]
+    if len(set(names)) != len(names):
+        raise ValueError('aggregate names must be unique')
+    columns = list(dict.fromkeys(column for aggregate in aggregates for column in aggregate.by))
+    # positional aliases, DuckDB names are case-insensitive and 'seasons' would clash with SEASONS
+    partials, merges = [], []
+    for position, aggregate in enumerate(aggregates):
+        expressions = aggregate.partials()
+        aliases = [f'_{position}_{number}' for number in range(len(expressions))]
+        partials += [f'{expression} AS {alias}' for expression, alias in zip(expressions, aliases)]
+        merges.append(f'{aggregate.merge(aliases)} AS _{position}')
+    keys = ', '.join(columns)
+    partials, merges = ',\n    '.join(partials), ',\n  '.join(merges)
+    if not columns:
+        return f'WITH partials AS (\n  SELECT\n    {partials}\n  FROM {table}\n)\nSELECT\n  {merges}\nFROM partials', columns
+    sets = ', '.join('(' + ', '.join(by) + ')' for by in dict.fromkeys(aggregate.by for aggregate in aggregates))
+    return (f'WITH partials AS (\n  SELECT\n    {keys},\n    {partials}\n  FROM {table}\n  GROUP BY {keys}\n)\n'
+            f'SELECT\n  GROUPING({keys}) AS _grouping,\n  {keys},\n  {merges}\n'
+            f'FROM partials\nGROUP BY GROUPING SETS ({sets})'), columns
+
+
+def _grouping_id(by: Sequence[str], columns: Sequence[str]) -> int:
+    # GROUPING() sets the bit of every column that is not grouped, the first column is the highest bit
+    return sum(1 << (len(columns) - 1 - position) for position, column in enumerate(columns) if column not in by)
+
+
+def _unpack(values: pd.Series, by: Sequence[str], rows: pd.DataFrame) -> pd.DataFrame:
+    """Rows of an argmax aggregate: one per returned struct, with the group columns."""
+    frame = rows[list(by)].assign(_rows=values.to_numpy()).explode('_rows').dropna(subset=['_rows'])
+    fields = pd.DataFrame(frame['_rows'].tolist(), index=frame.index)
+    return pd.concat([frame[list(by)], fields], axis=1).reset_index(drop=True)
+
+
+def execute(con: duckdb.DuckDBPyConnection, aggregates: Sequence[Aggregate], table: str = 'SEOUL_BIKE_SHARING') -> dict:
+    """Every aggregate of the batch by name, from one scan of ``table``.
+
+    Ungrouped aggregates give a scalar, grouped ones a Series indexed by
+    their ``by`` columns, ``argmax`` aggregates a frame of rows.
+    """
+    sql, columns = compile_batch(aggregates, table)
+    result = con.execute(sql).df()
+    values = {}
+    for position, aggregate in enumerate(aggregates):
+        rows = result if not columns else result[result['_grouping'] == _grouping_id(aggregate.by, columns)]
+        if aggregate.func == 'argmax':
+            values[aggregate.name] = _unpack(rows[f'_{position}'], aggregate.by, rows)
+        elif aggregate.by:
+            values[aggregate.name] = rows.set_index(list(aggregate.by))[f'_{position}'].sort_index().rename(aggregate.name)
+        else:
+            values[aggregate.name] = rows[f'_{position}'].iloc[0]
+    return values
+
+
+WEATHER = ('TEMPERATURE', 'HUMIDITY', 'WIND_SPEED', 'VISIBILITY', 'DEW_POINT_TEMPERATURE',
+           'SOLAR_RADIATION', 'RAINFALL', 'SNOWFALL')
+
+# tasks 1, 2, 4, 5, 6, 7, 8 and 9 of the lab as one batch
+LAB_BATCH = (
+    Aggregate('record_count', 'count'),
+    Aggregate('operational_hours', 'sum', 'HOUR', where='RENTED_BIKE_COUNT > 0'),
+    Aggregate('seasons', 'distinct', 'SEASONS'),
+    Aggregate('first_date', 'min', 'DATE'),
+    Aggregate('last_date', 'max', 'DATE'),
+    Aggregate('all_time_high', 'argmax', 'RENTED_BIKE_COUNT', values=('DATE', 'HOUR')),
+    Aggregate('avg_temp', 'avg', 'TEMPERATURE', by=('SEASONS', 'HOUR')),
+    Aggregate('avg_rent', 'avg', 'RENTED_BIKE_COUNT', by=('SEASONS', 'HOUR')),
+    Aggregate('avg_bike_count', 'avg', 'RENTED_BIKE_COUNT', by=('SEASONS',)),
+    Aggregate('min_bike_count', 'min', 'RENTED_BIKE_COUNT', by=('SEASONS',)),
+    Aggregate('max_bike_count', 'max', 'RENTED_BIKE_COUNT', by=('SEASONS',)),
+    Aggregate('std_dev_bike_count', 'stddev', 'RENTED_BIKE_COUNT', by=('SEASONS',)),
+    *(Aggregate(f'avg_{column.lower()}', 'avg', column, by=('SEASONS',)) for column in WEATHER),
+)
+
+
+def run_lab_batch(con: duckdb.DuckDBPyConnection, table: str = 'SEOUL_BIKE_SHARING') -> dict:
+    """:data:`LAB_BATCH` shaped like the lab's answers (tasks 7 to 9 as frames)."""
+    values = execute(con, LAB_BATCH, table)
+    hourly = pd.DataFrame({'avg_temp': values.pop('avg_temp'), 'avg_rent': values.pop('avg_rent')})
+    values['hourly_popularity'] = hourly.nlargest(10, 'avg_rent').reset_index()
+    seasonal = pd.DataFrame({name: values.pop(name) for name in
+                             ['avg_bike_count', 'min_bike_count', 'max_bike_count', 'std_dev_bike_count',
+                              *(f'avg_{column.lower()}' for column in WEATHER)]})
+    values['seasonality'] = seasonal.sort_values('avg_bike_count', ascending=False).reset_index()
+    return values
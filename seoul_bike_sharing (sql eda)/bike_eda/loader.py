@@ -0,0 +1,163 @@
+"""Bulk load of the lab's CSV files into an in-process DuckDB database.
+
+Lab-SQL-EDA.ipynb opens an ODBC connection to a hosted Db2 instance and
+sends every query over the network with ``sqlQuery(conn, query)``, although
+``seoul_bike_sharing.csv`` sits next to it. :func:`connect` loads the CSV
+with one ``CREATE TABLE ... AS SELECT * FROM read_csv(...)`` per file: typed
+columns, ``DATE`` parsed from ``dd/mm/yyyy`` and ``'NA'`` read as NULL (so
+``BIKE_SHARING_SYSTEMS.BICYCLES`` no longer needs the lab's ``UPDATE``).
+``DATE`` and ``HOUR`` are combined into the ``DATE_HOUR`` timestamp and the
+rows are stored sorted by it, so the zone maps of :mod:`bike_eda.zonemap`
+cover narrow time ranges. The companion tables are loaded when their files
+are present. :func:`run_lab` runs the lab's queries (:data:`QUERIES`) on
+that database.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+
+SEOUL_BIKE_SHARING = 'seoul_bike_sharing.csv'
+
+# column types of seoul_bike_sharing.csv, in file order
+SEOUL_BIKE_SHARING_TYPES = {
+    'DATE': 'DATE',
+    'RENTED_BIKE_COUNT': 'INTEGER',
+    'HOUR': 'TINYINT',
+    'TEMPERATURE': 'DOUBLE',
+    'HUMIDITY': 'TINYINT',
+    'WIND_SPEED': 'DOUBLE',
+    'VISIBILITY': 'SMALLINT',
+    'DEW_POINT_TEMPERATURE': 'DOUBLE',
+    'SOLAR_RADIATION': 'DOUBLE',
+    'RAINFALL': 'DOUBLE',
+    'SNOWFALL': 'DOUBLE',
+    'SEASONS': 'VARCHAR',
+    'HOLIDAY': 'VARCHAR',
+    'FUNCTIONING_DAY': 'VARCHAR',
+}
+
+DATE_FORMAT = '%d/%m/%Y'
+
+# the hour of each row as one timestamp, the sort order of the stored table
+DATE_HOUR = 'DATE_HOUR'
+DATE_HOUR_SQL = 'DATE + to_hours(HOUR)'
+
+# the other tables of the lab, loaded with detected types when the file exists
+COMPANIONS = {
+    'CITIES_WEATHER_FORECAST': 'cities_weather_forecast.csv',
+    'WORLD_CITIES': 'world_cities.csv',
+    'BIKE_SHARING_SYSTEMS': 'bike_sharing_systems.csv',
+}
+
+
+def _columns_sql(types: Mapping[str, str]) -> str:
+    return '{' + ', '.join(f"'{name}': '{type_}'" for name, type_ in types.items()) + '}'
+
+
+def load_seoul_bike_sharing(con: duckdb.DuckDBPyConnection, path, table: str = 'SEOUL_BIKE_SHARING') -> None:
+    con.execute(
+        f'CREATE OR REPLACE TABLE {table} AS SELECT *, {DATE_HOUR_SQL} AS {DATE_HOUR} FROM read_csv(?, header = true, '
+        f"columns = {_columns_sql(SEOUL_BIKE_SHARING_TYPES)}, dateformat = '{DATE_FORMAT}', nullstr = 'NA') "
+        f'ORDER BY {DATE_HOUR}',
+        [str(path)],
+    )
+
+
+def _column_names(con: duckdb.DuckDBPyConnection, relation: str) -> set[str]:
+    return {name.upper() for (name,) in con.execute(f'SELECT column_name FROM (DESCRIBE {relation})').fetchall()}
+
+
+def insert_rows(con: duckdb.DuckDBPyConnection, rows: str, table: str = 'SEOUL_BIKE_SHARING') -> None:
+    """Append the table or view ``rows`` to ``table`` by column name, sorted by ``DATE_HOUR``.
+
+    ``DATE_HOUR`` is computed when ``rows`` lacks it and ``table`` has it.
+    """
+    if DATE_HOUR not in _column_names(con, table):
+        con.execute(f'INSERT INTO {table} BY NAME SELECT * FROM {rows}')
+        return
+    select = '*' if DATE_HOUR in _column_names(con, rows) else f'*, {DATE_HOUR_SQL} AS {DATE_HOUR}'
+    con.execute(f'INSERT INTO {table} BY NAME SELECT {select} FROM {rows} ORDER BY {DATE_HOUR}')
+
+
+def connect(directory='.', database: str = ':memory:') -> duckdb.DuckDBPyConnection:
+    """A DuckDB connection with ``SEOUL_BIKE_SHARING`` and the companion tables found in ``directory``."""
+    directory = Path(directory)
+    con = duckdb.connect(database)
+    load_seoul_bike_sharing(con, directory / SEOUL_BIKE_SHARING)
+    for table, name in COMPANIONS.items():
+        if (directory / name).exists():
+            con.execute(f"CREATE OR REPLACE TABLE {table} AS SELECT * FROM read_csv(?, header = true, nullstr = 'NA')",
+                        [str(directory / name)])
+    return con
+
+
+@dataclass(frozen=True)
+class Query:
+    sql: str
+    tables: tuple[str, ...] = ('SEOUL_BIKE_SHARING',)
+
+
+# the lab's solutions, task by task
+QUERIES = {
+    'record_count': Query('SELECT COUNT(*) FROM SEOUL_BIKE_SHARING'),
+    'operational_hours': Query('SELECT SUM(HOUR) FROM SEOUL_BIKE_SHARING WHERE RENTED_BIKE_COUNT > 0'),
+    'weather_outlook': Query("SELECT * FROM CITIES_WEATHER_FORECAST WHERE CITY = 'Seoul' LIMIT 1",
+                             ('CITIES_WEATHER_FORECAST',)),
+    'seasons': Query('SELECT DISTINCT SEASONS FROM SEOUL_BIKE_SHARING'),
+    'date_range': Query('SELECT MIN(DATE) AS First_Date, MAX(DATE) AS Last_Date FROM SEOUL_BIKE_SHARING'),
+    'all_time_high': Query("""SELECT DATE, HOUR, RENTED_BIKE_COUNT
+FROM SEOUL_BIKE_SHARING
+WHERE RENTED_BIKE_COUNT = (SELECT MAX(RENTED_BIKE_COUNT) FROM SEOUL_BIKE_SHARING)"""),
+    'hourly_popularity': Query("""SELECT SEASONS, HOUR, AVG(TEMPERATURE) AS avg_temp, AVG(RENTED_BIKE_COUNT) AS avg_rent
+FROM SEOUL_BIKE_SHARING
+GROUP BY SEASONS, HOUR
+ORDER BY avg_rent DESC
+LIMIT 10"""),
+    # Db2's STDDEV is the population standard deviation, DuckDB's is the sample one
+    'rental_seasonality': Query("""SELECT SEASONS,
+       AVG(RENTED_BIKE_COUNT) AS avg_bike_count,
+       MIN(RENTED_BIKE_COUNT) AS min_bike_count,
+       MAX(RENTED_BIKE_COUNT) AS max_bike_count,
+       STDDEV_POP(RENTED_BIKE_COUNT) AS std_dev_bike_count
+FROM SEOUL_BIKE_SHARING
+GROUP BY SEASONS"""),
+    'weather_seasonality': Query("""SELECT SEASONS, AVG(RENTED_BIKE_COUNT) AS avg_bike_count, AVG(TEMPERATURE) AS avg_temp,
+       AVG(HUMIDITY) AS avg_humidity, AVG(WIND_SPEED) AS avg_wind_speed,
+       AVG(VISIBILITY) AS avg_visibility, AVG(DEW_POINT_TEMPERATURE) AS avg_dew_point_temp,
+       AVG(SOLAR_RADIATION) AS avg_solar_radiation, AVG(RAINFALL) AS avg_rainfall,
+       AVG(SNOWFALL) AS avg_snowfall
+FROM SEOUL_BIKE_SHARING
+GROUP BY SEASONS
+ORDER BY avg_bike_count DESC"""),
+    'seoul_bikes': Query("""SELECT WORLD_CITIES.CITY, WORLD_CITIES.COUNTRY, WORLD_CITIES.LAT,
+       WORLD_CITIES.LNG, WORLD_CITIES.POPULATION,
+       SUM(BIKE_SHARING_SYSTEMS.BICYCLES) AS TOTAL_BIKES
+FROM WORLD_CITIES
+JOIN BIKE_SHARING_SYSTEMS ON WORLD_CITIES.CITY_ASCII = BIKE_SHARING_SYSTEMS.CITY
+WHERE WORLD_CITIES.CITY = 'Seoul'
+GROUP BY WORLD_CITIES.CITY, WORLD_CITIES.COUNTRY, WORLD_CITIES.LAT, WORLD_CITIES.LNG, WORLD_CITIES.POPULATION""",
+                         ('WORLD_CITIES', 'BIKE_SHARING_SYSTEMS')),
+    # 'NA' bicycles are NULL since the load, SUM skips them
+    'comparable_cities': Query("""SELECT wc.CITY AS CITY, wc.COUNTRY AS COUNTRY, wc.LAT AS LAT, wc.LNG AS LNG,
+       wc.POPULATION AS POPULATION, SUM(bs.BICYCLES) AS BICYCLES
+FROM WORLD_CITIES wc
+JOIN BIKE_SHARING_SYSTEMS bs ON wc.CITY = bs.CITY
+GROUP BY wc.CITY, wc.COUNTRY, wc.LAT, wc.LNG, wc.POPULATION
+HAVING SUM(bs.BICYCLES) BETWEEN 15000 AND 20000""",
+                               ('WORLD_CITIES', 'BIKE_SHARING_SYSTEMS')),
+}
+
+
+def tables(con: duckdb.DuckDBPyConnection) -> set[str]:
+    return {name.upper() for (name,) in con.execute('SELECT table_name FROM information_schema.tables').fetchall()}
+
+
+def run_lab(con: duckdb.DuckDBPyConnection, queries: Mapping[str, Query] = QUERIES) -> dict[str, pd.DataFrame]:
+    """Run ``queries`` on ``con``, skipping those whose tables were not loaded."""
+    loaded = tables(con)
+    return {name: con.execute(query.sql).df() for name, query in queries.items() if loaded.issuperset(query.tables)}
@@ -0,0 +1,122 @@
+"""Per-block min/max zone maps of the bike table.
+
+In the lab's Db2 table ``DATE`` is a ``dd/mm/yyyy`` string, so task 5's
+``MIN(DATE)``/``MAX(DATE)`` compare text (01/01/2018 and 31/12/2017) and a
+date-range filter has to read every row. :mod:`bike_eda.loader` stores
+``DATE`` typed, adds the ``DATE_HOUR`` timestamp and sorts the rows by it.
+:class:`ZoneMap` splits the stored rows into blocks of ``block_rows``
+consecutive row ids and keeps the row count, minimum and maximum of each
+zone column per block in a small side table. ``MIN``/``MAX`` come from that
+table alone, and :meth:`ZoneMap.scan` reads only the row-id ranges of the
+blocks whose [min, max] overlap the requested range.
+"""
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import duckdb
+import pandas as pd
+
+from bike_eda.loader import DATE_HOUR
+
+BLOCK_ROWS = 1024
+
+ZONE_COLUMNS = (DATE_HOUR, 'DATE')
+
+
+def _range(low, high, lower: str, upper: str) -> tuple[list[str], list]:
+    """Conditions ``lower >= low`` and ``upper <= high`` and their parameters, for the bounds given."""
+    conditions, parameters = [], []
+    if low is not None:
+        conditions.append(f'{lower} >= ?')
+        parameters.append(low)
+    if high is not None:
+        conditions.append(f'{upper} <= ?')
+        parameters.append(high)
+    return conditions, parameters
+
+
+class ZoneMap:
+    """Zone maps of ``columns`` over ``table``, kept in the DuckDB table ``<table>_ZONES``.
+
+    Appended rows are covered by :meth:`extend`. Rows must not be updated or
+    deleted in place; :meth:`build` again if they are.
+    """
+
+    def __init__(
+        self,
+        con: duckdb.DuckDBPyConnection,
+        table: str = 'SEOUL_BIKE_SHARING',
+        columns: Sequence[str] = ZONE_COLUMNS,
+        block_rows: int = BLOCK_ROWS,
+    ):
+        if block_rows < 1:
+            raise ValueError(f'block_rows must be positive, got {block_rows}')
+        self.con = con
+        self.table = table
+        self.zones = f'{table}_ZONES'
+        self.columns = tuple(columns)
+        self.block_rows = block_rows
+
+    def _zones_sql(self, first_row: int = 0) -> str:
+        bounds = ', '.join(f'MIN({column}) AS MIN_{column}, MAX({column}) AS MAX_{column}' for column in self.columns)
+        return (f'SELECT rowid // {self.block_rows} AS BLOCK, MIN(rowid) AS FIRST_ROW, MAX(rowid) AS LAST_ROW, '
+                f'COUNT(*) AS ROWS, {bounds} FROM {self.table} WHERE rowid >= {first_row} GROUP BY BLOCK ORDER BY BLOCK')
+
+    def build(self) -> None:
+        """(Re)compute the zones of every block, in one scan."""
+        self.con.execute(f'CREATE OR REPLACE TABLE {self.zones} AS {self._zones_sql()}')
+
+    def extend(self) -> None:
+        """Cover the rows appended since the last :meth:`build` or :meth:`extend`.
+
+        Only the last, possibly partial, block and the new ones are scanned.
+        """
+        (covered,) = self.con.execute(f'SELECT MAX(LAST_ROW) FROM {self.zones}').fetchone()
+        if covered is None:
+            self.build()
+            return
+        block = (covered + 1) // self.block_rows
+        self.con.execute(f'DELETE FROM {self.zones} WHERE BLOCK >= {block}')
+        self.con.execute(f'INSERT INTO {self.zones} {self._zones_sql(block * self.block_rows)}')
+
+    def _check(self, column: str) -> None:
+        if column not in self.columns:
+            raise KeyError(f'no zone map for {column!r}, zone columns are {list(self.columns)}')
+
+    def min(self, column: str = DATE_HOUR):
+        """``MIN(column)`` of the table, from the zones only."""
+        self._check(column)
+        return self.con.execute(f'SELECT MIN(MIN_{column}) FROM {self.zones}').fetchone()[0]
+
+    def max(self, column: str = DATE_HOUR):
+        """``MAX(column)`` of the table, from the zones only."""
+        self._check(column)
+        return self.con.execute(f'SELECT MAX(MAX_{column}) FROM {self.zones}').fetchone()[0]
+
+    def blocks(self, low=None, high=None, column: str = DATE_HOUR) -> pd.DataFrame:
+        """The zones that may hold rows with ``low <= column <= high`` (``None`` is unbounded)."""
+        self._check(column)
+        # a block overlaps the range when its max is past low and its min before high
+        conditions, parameters = _range(low, high, f'MAX_{column}', f'MIN_{column}')
+        where = ' AND '.join(conditions) or 'TRUE'
+        return self.con.execute(f'SELECT * FROM {self.zones} WHERE {where} ORDER BY BLOCK', parameters).df()
+
+    def scan_sql(self, low=None, high=None, column: str = DATE_HOUR, select: str = '*') -> tuple[str, list]:
+        """The range query over the overlapping blocks, and its parameters."""
+        blocks = self.blocks(low, high, column)
+        # adjacent blocks merge into one row-id range
+        ranges = []
+        for first, last in zip(blocks['FIRST_ROW'], blocks['LAST_ROW']):
+            if ranges and ranges[-1][1] + 1 == first:
+                ranges[-1][1] = last
+            else:
+                ranges.append([first, last])
+        pruned = ' OR '.join(f'rowid BETWEEN {first} AND {last}' for first, last in ranges) or 'FALSE'
+        conditions, parameters = _range(low, high, column, column)
+        return f'SELECT {select} FROM {self.table} WHERE {" AND ".join([f"({pruned})", *conditions])}', parameters
+
+    def scan(self, low=None, high=None, column: str = DATE_HOUR, select: str = '*') -> pd.DataFrame:
+        """The rows with ``low <= column <= high``, reading only the overlapping blocks."""
+        sql, parameters = self.scan_sql(low, high, column, select)
+        return self.con.execute(sql, parameters).df()